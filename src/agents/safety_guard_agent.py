@@ -3,17 +3,125 @@ Safety & Compliance Guard Agent - Agent 6
 Role: Flag anomalies and unusual transactions for security
 """
 
-from typing import Dict, Any, List, Optional
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+from dataclasses import dataclass
+from functools import cached_property
 from datetime import datetime
-from collections import Counter
 import numpy as np
-from langchain.tools import BaseTool
-from langchain.agents import AgentExecutor
+from sklearn.ensemble import IsolationForest
 from pydantic import BaseModel, Field
 
-from ..schemas.transaction_schemas import ClassifiedTransaction, SecurityAlert
+from ..schemas.transaction_schemas import ClassifiedTransaction, SecurityAlert, TransactionCategory
 from ..models.anomaly_detector import AnomalyDetector
-from ..utils.security_utils import SecurityValidator
+
+
+class StringInterner:
+    """Map strings to dense int codes (in first-seen order) for NumPy grouping"""
+
+    def __init__(self):
+        self.codes: Dict[str, int] = {}
+        self.strings: List[str] = []
+
+    def __getitem__(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = self.codes[value] = len(self.strings)
+            self.strings.append(value)
+        return code
+
+    def __len__(self) -> int:
+        return len(self.strings)
+
+    def encode(self, values: Iterable[str], count: int) -> np.ndarray:
+        """Encode an iterable of strings into an int32 code array"""
+        return np.fromiter((self[value] for value in values), dtype=np.int32, count=count)
+
+
+# Hour-of-day lookup for the time detector: 1:00 AM - 3:00 AM is suspicious by default
+_DEFAULT_HOUR_LUT = np.zeros(24, dtype=np.uint8)
+_DEFAULT_HOUR_LUT[1:3] = 1
+
+# Columns in the _featurize layout; a persisted anomaly model is only used if it was trained on it
+_FOREST_FEATURES = 5
+
+# Isolation forests fitted on profile history_features, used when no persisted model is available.
+# Agents are created per workflow run, so the fitted forests are kept at module level:
+# (user_id, profile_version) -> forest, evicted LRU beyond _PROFILE_FOREST_CACHE_SIZE
+_PROFILE_FOREST_CACHE_SIZE = 1024
+_profile_forests: "OrderedDict[Tuple[str, Any], IsolationForest]" = OrderedDict()
+_profile_forests_lock = threading.Lock()
+
+# Anomaly type bits used to track which alerts a transaction already has
+_AMOUNT_ALERT = 1
+_FREQUENCY_ALERT = 2
+_LOCATION_ALERT = 4
+_TIME_ALERT = 8
+
+
+def _risk_score(n_transactions: int, anomaly_amounts: np.ndarray, anomaly_hours: np.ndarray) -> float:
+    """
+    Batch risk kernel: twice the anomaly ratio, +0.3 per high-value (> 500) anomaly and
+    +0.1 per other anomaly before 3 AM, capped at 1.0
+    """
+    high_value = anomaly_amounts > 500
+    late_night = ~high_value & (anomaly_hours < 3)
+    risk_score = (len(anomaly_amounts) / n_transactions) * 2
+    risk_score += 0.3 * np.count_nonzero(high_value) + 0.1 * np.count_nonzero(late_night)
+
+    # Every increment is non-negative, so clamping once matches clamping after each step
+    return float(min(1.0, risk_score))
+
+
+@dataclass(slots=True)
+class _InternalAlert:
+    """Lightweight alert record used inside the agent; converted to SecurityAlert on output"""
+    alert_type: str
+    severity: str
+    title: str
+    description: str
+    transaction_id: str
+    risk_score: float
+    recommended_action: str
+    timestamp: datetime
+    merchant: Optional[str] = None
+    amount: Optional[float] = None
+
+    def to_security_alert(self) -> SecurityAlert:
+        return SecurityAlert.model_construct(
+            alert_type=self.alert_type,
+            severity=self.severity,
+            title=self.title,
+            description=self.description,
+            transaction_id=self.transaction_id,
+            risk_score=self.risk_score,
+            recommended_action=self.recommended_action,
+            timestamp=self.timestamp,
+            merchant=self.merchant,
+            amount=self.amount
+        )
+
+
+@dataclass(slots=True)
+class _ProfileBaselines:
+    """
+    Typed view of the user profile, derived once per batch and shared by every detector
+    and the alert builders, so the hot path reads slots instead of re-hashing dict keys
+    """
+    history: Optional[np.ndarray]
+    cat_to_idx: Optional[Dict[str, int]]
+    cat_mean: Optional[np.ndarray]
+    cat_std: Optional[np.ndarray]
+    merchant_to_idx: Optional[Dict[str, int]]
+    merchant_count_mean: Optional[np.ndarray]
+    merchant_count_std: Optional[np.ndarray]
+    frequency_threshold: int
+    category_threshold: int
+    location_threshold: int
+    currency: str
+    spending_limits: Dict[str, float]
+    hour_lut: np.ndarray
 
 
 class SafetyGuardAgentInput(BaseModel):
@@ -44,125 +152,392 @@ class SafetyGuardAgent:
 
     def __init__(self, config: Dict[str, Any] = None):
         self.config = config or {}
-        self.anomaly_detector = AnomalyDetector()
-        self.security_validator = SecurityValidator()
 
-    def detect_amount_anomalies(self, transactions: List[ClassifiedTransaction], user_profile: Dict[str, Any]) -> List[ClassifiedTransaction]:
+    @cached_property
+    def anomaly_detector(self) -> AnomalyDetector:
         """
-        Detect transactions with unusual amounts using statistical outlier detection (IQR method)
+        ML anomaly detector with the persisted model (if any), created on first access
+        Only the isolation-forest path reads it, so batches without transactions never load it
         """
-        if not transactions or len(transactions) < 4:
-            # Need at least 4 transactions for meaningful statistical analysis
-            return []
+        return AnomalyDetector()
+
+    def _extract_soa(self, transactions: List[ClassifiedTransaction]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Extract the numeric Structure-of-Arrays buffers for a transaction batch
+        String columns are interned separately by _encode_batch
+        Returns (amounts, hours, bulk_mask, tx_codes), where tx_codes interns the transaction IDs
+        """
+        amounts = self._abs_amounts(transactions)
+        hours, bulk_mask = self._extract_time_features(transactions)
+        tx_codes = StringInterner().encode((tx.id for tx in transactions), len(transactions))
 
-        # Get historical transactions from user profile for better baseline
+        return amounts, hours, bulk_mask, tx_codes
+
+    def _encode_batch(self, transactions: List[ClassifiedTransaction]) -> Tuple[np.ndarray, np.ndarray, List[str], List[str]]:
+        """
+        Intern merchant and category strings once per batch
+        Dense int codes let the detectors group with np.bincount instead of Python dicts
+        Returns (merchant_ids, category_ids, merchant_names, category_names), where the
+        name lists map each code back to its string
+        """
+        n = len(transactions)
+        merchants = StringInterner()
+        categories = StringInterner()
+
+        # merchant_name doubles as the location identifier
+        merchant_ids = merchants.encode((tx.merchant_name or 'Unknown' for tx in transactions), n)
+        category_ids = categories.encode((tx.predicted_category.value for tx in transactions), n)
+
+        return merchant_ids, category_ids, merchants.strings, categories.strings
+
+    @staticmethod
+    def _abs_amounts(transactions: List[ClassifiedTransaction]) -> np.ndarray:
+        """Absolute transaction amounts as a float64 array"""
+        return np.abs(np.fromiter((tx.amount for tx in transactions), dtype=np.float64, count=len(transactions)))
+
+    def _extract_time_features(self, transactions: List[ClassifiedTransaction]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Extract hour-of-day and a bulk-upload flag for each transaction in one pass
+        Bulk uploads carry source or batch_id metadata indicating batch processing
+        """
+        n = len(transactions)
+        hours = np.empty(n, dtype=np.int8)
+        bulk_mask = np.empty(n, dtype=bool)
+
+        for i, tx in enumerate(transactions):
+            hours[i] = tx.date.hour
+            metadata = getattr(tx, 'metadata', {}) or {}
+            bulk_mask[i] = metadata.get('source') == 'bulk_upload' or bool(metadata.get('batch_id'))
+
+        return hours, bulk_mask
+
+    @staticmethod
+    def _select(transactions: List[ClassifiedTransaction], order: np.ndarray) -> List[ClassifiedTransaction]:
+        """Materialize the transactions at the given batch indices, in that order"""
+        return [transactions[i] for i in order.tolist()]
+
+    @staticmethod
+    def _grouped(mask: np.ndarray, group_ids: np.ndarray) -> np.ndarray:
+        """
+        Indices selected by a mask, grouped by group code and in batch order within each group
+        Interned codes follow first-seen order, so this is the order a dict of groups lists them in
+        """
+        idx = np.flatnonzero(mask)
+        return idx[np.argsort(group_ids[idx], kind='stable')]
+
+    def _build_baselines(self, user_profile: Dict[str, Any]) -> _ProfileBaselines:
+        """Derive the detector baselines from a user profile in one pass"""
         historical_amounts = user_profile.get('historical_amounts', [])
+        cat_to_idx, cat_mean, cat_std = self._baseline_arrays(user_profile, 'category_baselines')
+        merchant_to_idx, merchant_count_mean, merchant_count_std = self._baseline_arrays(user_profile, 'merchant_count_baselines')
+
+        return _ProfileBaselines(
+            history=np.asarray(historical_amounts, dtype=np.float64) if historical_amounts else None,
+            cat_to_idx=cat_to_idx,
+            cat_mean=cat_mean,
+            cat_std=cat_std,
+            merchant_to_idx=merchant_to_idx,
+            merchant_count_mean=merchant_count_mean,
+            merchant_count_std=merchant_count_std,
+            # Flag merchants with high frequency (more than 10 transactions)
+            frequency_threshold=user_profile.get('frequency_threshold', 10),
+            # Flag categories with extremely high frequency (more than 15 transactions)
+            category_threshold=user_profile.get('category_frequency_threshold', 15),
+            # Flag locations with excessive repetition (15-20+ times)
+            location_threshold=user_profile.get('location_repetition_threshold', 15),
+            # Currency from user preferences (default to LKR)
+            currency=user_profile.get('preferences', {}).get('currency', 'LKR'),
+            spending_limits=user_profile.get('spending_limits', {}),
+            hour_lut=self._hour_lut(user_profile)
+        )
 
-        # Combine current and historical amounts
-        amounts = [abs(tx.amount) for tx in transactions]
-        if historical_amounts:
-            amounts = historical_amounts + amounts
+    @staticmethod
+    def _hour_lut(user_profile: Dict[str, Any]) -> np.ndarray:
+        """24-slot uint8 lookup of suspicious hours; the profile may override them with unusual_hours"""
+        unusual_hours = user_profile.get('unusual_hours')
+        if unusual_hours is None:
+            return _DEFAULT_HOUR_LUT
+        lut = np.zeros(24, dtype=np.uint8)
+        lut[list(unusual_hours)] = 1
+        return lut
+
+    def _combine_with_history(self, amounts: np.ndarray, baselines: _ProfileBaselines) -> np.ndarray:
+        """Prepend the user's historical amounts (if any) for a better statistical baseline"""
+        if baselines.history is None:
+            return amounts
+        return np.concatenate((baselines.history, amounts))
+
+    def _baseline_arrays(self, user_profile: Dict[str, Any], field: str) -> Tuple[Optional[Dict[str, int]], Optional[np.ndarray], Optional[np.ndarray]]:
+        """
+        (name -> index, means, stds) from a profile field shaped {name: {'mean': m, 'std': s}}
+        The arrays carry one extra neutral slot (std = inf) for names without a baseline
+        Returns (None, None, None) when the field is missing
+        """
+        baselines = user_profile.get(field)
+        if not baselines:
+            return None, None, None
+
+        name_to_idx = {name: i for i, name in enumerate(baselines)}
+        means = np.zeros(len(name_to_idx) + 1, dtype=np.float64)
+        stds = np.full(len(name_to_idx) + 1, np.inf, dtype=np.float64)
+        for name, i in name_to_idx.items():
+            means[i] = baselines[name].get('mean', 0.0)
+            stds[i] = baselines[name].get('std', 0.0)
+
+        return name_to_idx, means, stds
+
+    @staticmethod
+    def _baseline_slots(names: List[str], name_to_idx: Dict[str, int]) -> np.ndarray:
+        """Map a batch's interned names onto baseline slots (unknown names -> the neutral slot)"""
+        neutral = len(name_to_idx)
+        return np.fromiter((name_to_idx.get(name, neutral) for name in names), dtype=np.intp, count=len(names))
+
+    def _zscore_exceeds(self, values: np.ndarray, means: np.ndarray, stds: np.ndarray) -> np.ndarray:
+        """|z| > z_thresh for values against (already gathered) baseline means and stds"""
+        z = (values - means) / np.where(stds > 0, stds, 1.0)
+        return np.abs(z) > self.config.get('z_thresh', 3.0)
+
+    def _amount_zscores(self, amounts: np.ndarray, category_ids: np.ndarray, category_names: List[str],
+                        baselines: _ProfileBaselines) -> Optional[np.ndarray]:
+        """
+        |z| of each amount against its category's baseline mean and std
+        Returns None when the profile carries no category baselines
+        """
+        cat_to_idx = baselines.cat_to_idx
+        if cat_to_idx is None:
+            return None
+
+        # Map this batch's category codes onto the profile's baseline slots
+        cat_idx = self._baseline_slots(category_names, cat_to_idx)[category_ids]
+        sd = baselines.cat_std[cat_idx]
+
+        return np.abs((amounts - baselines.cat_mean[cat_idx]) / np.where(sd > 0, sd, 1.0))
+
+    def _mask_ensemble(self, abs_z: Optional[np.ndarray], forest_outliers: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        """
+        Combine the isolation-forest verdict and the category z-score into one score and threshold it once:
+        combined = outlier (0/1) + z_weight * |z| / z_thresh, flagged when combined >= flag_thresh
+        With the defaults (z_weight = flag_thresh = 1.0) either signal alone is enough; raising
+        flag_thresh requires the two to agree
+        Returns None when neither signal is available
+        """
+        if abs_z is None and forest_outliers is None:
+            return None
+
+        n = len(abs_z) if abs_z is not None else len(forest_outliers)
+        combined = np.zeros(n, dtype=np.float32)
+        if forest_outliers is not None:
+            combined += forest_outliers
+        if abs_z is not None:
+            combined += self.config.get('z_weight', 1.0) * (abs_z / self.config.get('z_thresh', 3.0))
+
+        return combined >= self.config.get('flag_thresh', 1.0)
+
+    def _mask_amount(self, amounts: np.ndarray, baselines: _ProfileBaselines,
+                     category_ids: Optional[np.ndarray] = None,
+                     category_names: Optional[List[str]] = None,
+                     forest_outliers: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Flag transactions with unusual amounts using statistical outlier detection (IQR method)
+        Amounts far from their category's baseline mean (when the profile has category_baselines)
+        and isolation-forest outliers are flagged through the combined ensemble score as well
+        """
+        abs_z = None
+        if category_ids is not None:
+            abs_z = self._amount_zscores(amounts, category_ids, category_names, baselines)
+        ensemble_mask = self._mask_ensemble(abs_z, forest_outliers)
 
         if len(amounts) < 4:
-            return []
+            # Need at least 4 transactions for meaningful statistical analysis
+            return ensemble_mask if ensemble_mask is not None else np.zeros(len(amounts), dtype=bool)
+
+        sample = self._combine_with_history(amounts, baselines)
 
         # Calculate IQR (Interquartile Range) for outlier detection
-        q1 = np.percentile(amounts, 25)
-        q3 = np.percentile(amounts, 75)
+        # Both quartiles come from a single partition of the sample
+        q1, q3 = np.quantile(sample, (0.25, 0.75))
         iqr = q3 - q1
 
         # Define outlier boundaries (using 1.5 * IQR, standard statistical method)
         lower_bound = q1 - (1.5 * iqr)
         upper_bound = q3 + (1.5 * iqr)
 
-        # Flag transactions that are outliers
-        anomalous_transactions = []
-        for tx in transactions:
-            amount = abs(tx.amount)
-            if amount > upper_bound or amount < lower_bound:
-                anomalous_transactions.append(tx)
-
-        return anomalous_transactions
+        mask = (amounts > upper_bound) | (amounts < lower_bound)
+        return mask if ensemble_mask is None else mask | ensemble_mask
 
-    def detect_frequency_anomalies(self, transactions: List[ClassifiedTransaction], user_profile: Dict[str, Any]) -> List[ClassifiedTransaction]:
+    def _featurize(self, transactions: List[ClassifiedTransaction], amounts: np.ndarray, hours: np.ndarray,
+                   merchant_ids: np.ndarray, category_ids: np.ndarray) -> np.ndarray:
         """
-        Detect unusual transaction frequency patterns
-        Flags merchants/categories with unusually high transaction frequency
+        Build the (N, 5) isolation-forest feature matrix for a batch:
+        amount, hour of day, day of week, merchant frequency, deviation from the category mean
+        float32 is what sklearn's tree code works in, so the forest scores it without a conversion copy
         """
-        if not transactions or len(transactions) < 5:
-            return []
-
-        anomalous_transactions = []
-
-        # Group transactions by merchant
-        merchant_groups = {}
-        for tx in transactions:
-            merchant = tx.merchant_name or 'Unknown'
-            if merchant not in merchant_groups:
-                merchant_groups[merchant] = []
-            merchant_groups[merchant].append(tx)
+        n = len(transactions)
+        X = np.empty((n, _FOREST_FEATURES), dtype=np.float32)
+        X[:, 0] = amounts
+        X[:, 1] = hours
+        X[:, 2] = np.fromiter((tx.date.weekday() for tx in transactions), dtype=np.int8, count=n)
+        X[:, 3] = np.bincount(merchant_ids)[merchant_ids]
 
-        # Flag merchants with high frequency (more than 10 transactions)
-        frequency_threshold = user_profile.get('frequency_threshold', 10)
+        category_totals = np.bincount(category_ids, weights=amounts)
+        category_counts = np.bincount(category_ids)
+        X[:, 4] = amounts - (category_totals / category_counts)[category_ids]
 
-        for merchant, txs in merchant_groups.items():
-            if len(txs) >= frequency_threshold:
-                # This merchant has unusually high frequency
-                anomalous_transactions.extend(txs)
+        return X
 
-        # Group transactions by category
-        category_groups = {}
-        for tx in transactions:
-            category = str(tx.predicted_category)
-            if category not in category_groups:
-                category_groups[category] = []
-            category_groups[category].append(tx)
+    def _profile_forest(self, user_profile: Dict[str, Any]) -> Optional[IsolationForest]:
+        """
+        Isolation forest for the profile's history_features (rows in _featurize layout)
+        Fitted once per (user_id, profile_version) and reused by later batches, so the
+        profile must bump profile_version whenever its feature history changes
+        Returns None when the profile carries no feature history or no user_id to key it by
+        """
+        history_features = user_profile.get('history_features')
+        user_id = user_profile.get('user_id')
+        if history_features is None or len(history_features) == 0 or user_id is None:
+            return None
+
+        key = (user_id, user_profile.get('profile_version', 0))
+        with _profile_forests_lock:
+            forest = _profile_forests.get(key)
+            if forest is not None:
+                _profile_forests.move_to_end(key)
+                return forest
+
+        forest = IsolationForest(n_estimators=100, contamination=0.01, random_state=42)
+        forest.fit(np.asarray(history_features, dtype=np.float32, order='C'))
+
+        with _profile_forests_lock:
+            _profile_forests[key] = forest
+            while len(_profile_forests) > _PROFILE_FOREST_CACHE_SIZE:
+                _profile_forests.popitem(last=False)
+        return forest
+
+    def _mask_forest(self, transactions: List[ClassifiedTransaction], amounts: np.ndarray, hours: np.ndarray,
+                     merchant_ids: np.ndarray, category_ids: np.ndarray, user_profile: Dict[str, Any]) -> Optional[np.ndarray]:
+        """
+        Score the whole batch with one isolation-forest call
+        Uses the persisted anomaly model when one was trained on the _featurize layout,
+        otherwise the forest fitted on the profile's history_features
+        Returns None when neither is available
+        """
+        if not transactions:
+            return None
 
-        # Flag categories with extremely high frequency (more than 15 transactions)
-        category_threshold = user_profile.get('category_frequency_threshold', 15)
+        detector = self.anomaly_detector
+        if detector.n_features == _FOREST_FEATURES:
+            X = self._featurize(transactions, amounts, hours, merchant_ids, category_ids)
+            return detector.predict_mask(X)
 
-        for category, txs in category_groups.items():
-            if len(txs) >= category_threshold:
-                # Add these if not already flagged
-                for tx in txs:
-                    if tx not in anomalous_transactions:
-                        anomalous_transactions.append(tx)
+        forest = self._profile_forest(user_profile)
+        if forest is None:
+            return None
 
-        return anomalous_transactions
+        X = np.asarray(self._featurize(transactions, amounts, hours, merchant_ids, category_ids), order='C')
+        scores = forest.score_samples(X)
+        # offset_ is the score threshold IsolationForest.predict uses for outliers
+        return scores < forest.offset_
 
-    def detect_location_anomalies(self, transactions: List[ClassifiedTransaction], user_profile: Dict[str, Any]) -> List[ClassifiedTransaction]:
+    def _order_freq(self, merchant_ids: np.ndarray, category_ids: np.ndarray, baselines: _ProfileBaselines,
+                    merchant_names: Optional[List[str]] = None,
+                    merchant_hist: Optional[np.ndarray] = None) -> np.ndarray:
         """
-        Detect transactions in unusual locations
-        Flags locations that appear more than 15-20 times (suspicious repetition)
+        Flag merchants/categories with unusually high transaction frequency
+        When the profile has merchant_count_baselines, merchants whose batch count is far
+        from their usual count (z-score) are flagged as well
+        Returns the flagged indices merchant by merchant, followed by the remaining
+        category-flagged ones category by category
         """
-        if not transactions:
-            return []
+        if len(merchant_ids) < 5:
+            return np.empty(0, dtype=np.intp)
+
+        # Per-group histograms, gathered back onto each transaction
+        if merchant_hist is None:
+            merchant_hist = np.bincount(merchant_ids)
+        merchant_mask = merchant_hist[merchant_ids] >= baselines.frequency_threshold
+        category_mask = np.bincount(category_ids)[category_ids] >= baselines.category_threshold
+
+        if baselines.merchant_to_idx is not None and merchant_names is not None:
+            # One z-score per merchant, then gathered onto its transactions
+            slots = self._baseline_slots(merchant_names, baselines.merchant_to_idx)
+            flagged_merchants = self._zscore_exceeds(
+                merchant_hist, baselines.merchant_count_mean[slots], baselines.merchant_count_std[slots]
+            )
+            merchant_mask |= flagged_merchants[merchant_ids]
 
-        anomalous_transactions = []
+        return np.concatenate((
+            self._grouped(merchant_mask, merchant_ids),
+            self._grouped(category_mask & ~merchant_mask, category_ids)
+        ))
 
-        # Count transactions by location (using merchant_name as proxy for location)
-        location_counter = Counter()
-        location_to_transactions = {}
+    def _mask_location(self, merchant_ids: np.ndarray, baselines: _ProfileBaselines,
+                       merchant_hist: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Flag locations that appear more than 15-20 times (suspicious repetition)
+        Uses merchant_name as the location identifier
+        """
+        if merchant_hist is None:
+            merchant_hist = np.bincount(merchant_ids)
+        return merchant_hist[merchant_ids] >= baselines.location_threshold
 
-        for tx in transactions:
-            # Use merchant_name as location identifier
-            # In future, can use actual location data if available
-            location = tx.merchant_name or 'Unknown'
-            location_counter[location] += 1
+    def _mask_time(self, hours: np.ndarray, bulk_mask: np.ndarray, hour_lut: np.ndarray = _DEFAULT_HOUR_LUT) -> np.ndarray:
+        """
+        Flag transactions in suspicious hours (1:00 AM - 3:00 AM unless the profile sets unusual_hours)
+        that are not part of a bulk upload
+        Bulk uploads carry default/system timestamps, so they are never flagged
+        """
+        # Branchless gather through the 24-slot hour lookup
+        return hour_lut.view(bool)[hours] & ~bulk_mask
 
-            if location not in location_to_transactions:
-                location_to_transactions[location] = []
-            location_to_transactions[location].append(tx)
+    def _detect_all(self, transactions: List[ClassifiedTransaction], amounts: np.ndarray, hours: np.ndarray,
+                    bulk_mask: np.ndarray, merchant_ids: np.ndarray, category_ids: np.ndarray,
+                    merchant_names: List[str], category_names: List[str],
+                    baselines: _ProfileBaselines, user_profile: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Run every detector over the shared batch arrays
+        Returns the amount, frequency, location and time anomaly indices, each in the order
+        its detector lists them; the merchant histogram is computed once for the frequency
+        and location detectors
+        """
+        merchant_hist = np.bincount(merchant_ids)
+
+        # Model outliers are scored together with the category z-scores as amount anomalies
+        forest_outliers = self._mask_forest(transactions, amounts, hours, merchant_ids, category_ids, user_profile)
+        return (
+            np.flatnonzero(self._mask_amount(amounts, baselines, category_ids, category_names, forest_outliers)),
+            self._order_freq(merchant_ids, category_ids, baselines, merchant_names, merchant_hist),
+            self._grouped(self._mask_location(merchant_ids, baselines, merchant_hist), merchant_ids),
+            np.flatnonzero(self._mask_time(hours, bulk_mask, baselines.hour_lut))
+        )
 
-        # Flag locations with excessive repetition (15-20+ times)
-        location_threshold = user_profile.get('location_repetition_threshold', 15)
+    def detect_amount_anomalies(self, transactions: List[ClassifiedTransaction], user_profile: Dict[str, Any]) -> List[ClassifiedTransaction]:
+        """
+        Detect transactions with unusual amounts using statistical outlier detection (IQR method)
+        plus per-category z-scores when the profile carries category_baselines
+        """
+        amounts = self._abs_amounts(transactions)
+        baselines = self._build_baselines(user_profile)
+        if baselines.cat_to_idx is not None:
+            _, category_ids, _, category_names = self._encode_batch(transactions)
+            return self._select(transactions, np.flatnonzero(self._mask_amount(amounts, baselines, category_ids, category_names)))
+        return self._select(transactions, np.flatnonzero(self._mask_amount(amounts, baselines)))
 
-        for location, count in location_counter.items():
-            if count >= location_threshold:
-                # This location appears too many times - suspicious
-                anomalous_transactions.extend(location_to_transactions[location])
+    def detect_frequency_anomalies(self, transactions: List[ClassifiedTransaction], user_profile: Dict[str, Any]) -> List[ClassifiedTransaction]:
+        """
+        Detect unusual transaction frequency patterns
+        Flags merchants/categories with unusually high transaction frequency
+        """
+        merchant_ids, category_ids, merchant_names, _ = self._encode_batch(transactions)
+        return self._select(transactions, self._order_freq(merchant_ids, category_ids, self._build_baselines(user_profile), merchant_names))
 
-        return anomalous_transactions
+    def detect_location_anomalies(self, transactions: List[ClassifiedTransaction], user_profile: Dict[str, Any]) -> List[ClassifiedTransaction]:
+        """
+        Detect transactions in unusual locations
+        Flags locations that appear more than 15-20 times (suspicious repetition)
+        """
+        merchant_ids, _, _, _ = self._encode_batch(transactions)
+        mask = self._mask_location(merchant_ids, self._build_baselines(user_profile))
+        return self._select(transactions, self._grouped(mask, merchant_ids))
 
     def detect_time_anomalies(self, transactions: List[ClassifiedTransaction], user_profile: Dict[str, Any]) -> List[ClassifiedTransaction]:
         """
@@ -170,81 +545,87 @@ class SafetyGuardAgent:
         ONLY flags if transaction explicitly has a time between 1:00 AM - 3:00 AM
         Does NOT flag transactions with default/system timestamps
         """
-        anomalous_transactions = []
-
-        # Define suspicious time window (1 AM to 3 AM)
-        suspicious_start_hour = 1
-        suspicious_end_hour = 3
-
-        for tx in transactions:
-            # Check if transaction has explicit time data (not just a default date)
-            # Only flag if the hour is explicitly set to suspicious hours
-            tx_hour = tx.date.hour
-            tx_minute = tx.date.minute
-            tx_second = tx.date.second
-
-            # Check if this is likely a real transaction time (not a default timestamp)
-            # Default timestamps usually have 00:00:00 or similar patterns
-            # Real transaction times have varying minutes/seconds
-            has_explicit_time = (tx_minute != 0 or tx_second != 0) or (
-                # Or if hour is in suspicious range with exact 00:00:00, still check
-                suspicious_start_hour <= tx_hour < suspicious_end_hour
-            )
+        hours, bulk_mask = self._extract_time_features(transactions)
+        return self._select(transactions, np.flatnonzero(self._mask_time(hours, bulk_mask, self._hour_lut(user_profile))))
+
+    def check_spending_limits(self, transactions: List[ClassifiedTransaction], limits: Dict[str, float], currency: str = "LKR") -> List[SecurityAlert]:
+        """Check if transactions exceed predefined spending limits"""
+        if not limits:
+            return []
+
+        _, category_ids, _, category_names = self._encode_batch(transactions)
+        return [
+            alert.to_security_alert()
+            for alert in self._limit_alerts(transactions, limits, currency, category_ids, category_names, self._abs_amounts(transactions))
+        ]
 
-            # Only flag if:
-            # 1. Transaction is in suspicious time window (1 AM - 3 AM)
-            # 2. Has explicit time data (not bulk upload default time)
-            if suspicious_start_hour <= tx_hour < suspicious_end_hour:
-                # Additional check: if this is bulk upload data, skip it
-                # Bulk uploads typically have metadata indicating batch processing
-                metadata = getattr(tx, 'metadata', {})
-                is_bulk_upload = metadata.get('source') == 'bulk_upload' or metadata.get('batch_id')
+    @staticmethod
+    def _category_limit(limits: Dict[str, float], category: str) -> float:
+        """
+        Spending limit for a category value such as 'food_dining' (+inf when none is set)
+        Limits saved under the str() form of the enum ('TransactionCategory.FOOD_DINING'),
+        which is what earlier versions looked up, still match
+        """
+        limit = limits.get(category)
+        if limit is None:
+            limit = limits.get(str(TransactionCategory(category)), np.inf)
+        return limit
 
-                # Only flag if NOT a bulk upload and has suspicious time
-                if not is_bulk_upload:
-                    anomalous_transactions.append(tx)
+    def _limit_alerts(self, transactions: List[ClassifiedTransaction], limits: Dict[str, float], currency: str,
+                      category_ids: np.ndarray, category_names: List[str], abs_amounts: np.ndarray) -> List[_InternalAlert]:
+        """
+        Build spending-limit alerts as internal alert records
+        Each category's limit is gathered onto its transactions and compared in one vector op;
+        categories without a configured limit get +inf and are never flagged
+        """
+        if not limits:
+            return []
 
-        return anomalous_transactions
+        limits_vec = np.fromiter((self._category_limit(limits, name) for name in category_names), dtype=np.float64, count=len(category_names))
+        over_idx = np.flatnonzero(abs_amounts > limits_vec[category_ids])
 
-    def check_spending_limits(self, transactions: List[ClassifiedTransaction], limits: Dict[str, float], currency: str = "LKR") -> List[SecurityAlert]:
-        """Check if transactions exceed predefined spending limits"""
+        now = datetime.now()
         alerts = []
-        for tx in transactions:
-            category_limit = limits.get(str(tx.predicted_category), float('inf'))
-            if abs(tx.amount) > category_limit:
-                alerts.append(SecurityAlert(
-                    alert_type="limit_exceeded",
-                    severity="medium",
-                    title=f"Spending limit exceeded for {tx.predicted_category}",
-                    description=f"Transaction on {tx.date.strftime('%Y-%m-%d %H:%M')} for {currency} {abs(tx.amount):.2f} at {tx.merchant_name} exceeds your {tx.predicted_category} limit of {currency} {category_limit:.2f}",
-                    transaction_id=tx.id,
-                    risk_score=0.6,
-                    recommended_action="Review transaction and consider adjusting budget",
-                    timestamp=datetime.now(),
-                    merchant=tx.merchant_name,
-                    amount=abs(tx.amount)
-                ))
+        for i in over_idx.tolist():
+            tx = transactions[i]
+            category = category_names[category_ids[i]]
+            amount = float(abs_amounts[i])
+            category_limit = limits_vec[category_ids[i]]
+            alerts.append(_InternalAlert(
+                alert_type="limit_exceeded",
+                severity="medium",
+                title=f"Spending limit exceeded for {category}",
+                description=f"Transaction on {tx.date.strftime('%Y-%m-%d %H:%M')} for {currency} {amount:.2f} at {tx.merchant_name} exceeds your {category} limit of {currency} {category_limit:.2f}",
+                transaction_id=tx.id,
+                risk_score=0.6,
+                recommended_action="Review transaction and consider adjusting budget",
+                timestamp=now,
+                merchant=tx.merchant_name,
+                amount=amount
+            ))
         return alerts
 
-    def calculate_risk_score(self, transactions: List[ClassifiedTransaction], anomalies: List[ClassifiedTransaction]) -> float:
-        """Calculate overall risk score for the transaction batch"""
+    def calculate_risk_score(self, transactions: List[ClassifiedTransaction], anomalies: List[ClassifiedTransaction],
+                             anomaly_amounts: Optional[np.ndarray] = None,
+                             anomaly_hours: Optional[np.ndarray] = None) -> float:
+        """
+        Calculate overall risk score for the transaction batch
+        anomaly_amounts / anomaly_hours may carry the anomalies' absolute amounts and hours
+        """
         if not transactions:
             return 0.0
 
-        # Calculate risk based on anomaly ratio and severity
-        anomaly_ratio = len(anomalies) / len(transactions)
-
-        # Base risk from anomaly ratio
-        risk_score = min(1.0, anomaly_ratio * 2)
-
-        # Increase risk for high-value anomalies
-        for anomaly in anomalies:
-            if abs(anomaly.amount) > 500:
-                risk_score = min(1.0, risk_score + 0.3)
-            elif anomaly.date.hour < 3:  # Only very unusual hours (3 AM rule)
-                risk_score = min(1.0, risk_score + 0.1)
+        if anomaly_amounts is None:
+            anomaly_amounts = self._abs_amounts(anomalies)
+        if anomaly_hours is None:
+            anomaly_hours = np.fromiter((anomaly.date.hour for anomaly in anomalies), dtype=np.int8, count=len(anomalies))
 
-        return risk_score
+        # Risk from the anomaly ratio, high-value anomalies and very unusual hours (3 AM rule)
+        return _risk_score(
+            len(transactions),
+            np.ascontiguousarray(anomaly_amounts, dtype=np.float64),
+            np.ascontiguousarray(anomaly_hours)
+        )
 
     def generate_security_alerts(self,
                                  flagged_transactions: List[ClassifiedTransaction],
@@ -257,88 +638,127 @@ class SafetyGuardAgent:
         Generate security alerts for flagged transactions
         Creates specific alerts based on anomaly type
         """
+        # Lay the anomaly lists out over one batch of distinct transactions
+        batch: List[ClassifiedTransaction] = []
+        positions: Dict[int, int] = {}
+        anomaly_lists = (amount_anomalies, frequency_anomalies, location_anomalies, time_anomalies)
+        for tx in (tx for anomalies in anomaly_lists for tx in anomalies):
+            if id(tx) not in positions:
+                positions[id(tx)] = len(batch)
+                batch.append(tx)
+
+        # Each list keeps its own order, which decides the alert order
+        orders = [np.array([positions[id(tx)] for tx in anomalies], dtype=np.intp) for anomalies in anomaly_lists]
+
+        _, category_ids, _, category_names = self._encode_batch(batch)
+        return [
+            alert.to_security_alert()
+            for alert in self._anomaly_alerts(
+                batch, *orders, currency, self._abs_amounts(batch), category_ids, category_names
+            )
+        ]
+
+    def _anomaly_alerts(self,
+                        transactions: List[ClassifiedTransaction],
+                        amount_idx: np.ndarray,
+                        frequency_idx: np.ndarray,
+                        location_idx: np.ndarray,
+                        time_idx: np.ndarray,
+                        currency: str,
+                        abs_amounts: np.ndarray,
+                        category_ids: np.ndarray,
+                        category_names: List[str],
+                        time_window: str = "between 1:00 AM - 3:00 AM") -> List[_InternalAlert]:
+        """
+        Build anomaly alerts as internal alert records
+        Each detector's flagged indices are walked in the order the detector listed them
+        """
+        # Format each flagged transaction's date and amount once, shared across alert types
+        date_strs: Dict[int, str] = {}
+        amount_strs: Dict[int, str] = {}
+        for i in np.concatenate((amount_idx, frequency_idx, location_idx)).tolist():
+            date_strs[i] = transactions[i].date.strftime('%Y-%m-%d %H:%M')
+            amount_strs[i] = f"{abs_amounts[i]:.2f}"
+
+        now = datetime.now()
         alerts = []
 
-        # Track which transactions have been alerted for which type
-        alerted_transactions = {}
+        # Bit flags per transaction ID for the alert types already emitted
+        alerted: Dict[str, int] = {}
 
         # Amount anomaly alerts
-        for tx in amount_anomalies:
-            if tx.id not in alerted_transactions:
-                alerted_transactions[tx.id] = []
-
-            if 'amount' not in alerted_transactions[tx.id]:
-                alerts.append(SecurityAlert(
+        for i in amount_idx.tolist():
+            tx = transactions[i]
+            bits = alerted.get(tx.id, 0)
+            if not bits & _AMOUNT_ALERT:
+                alerts.append(_InternalAlert(
                     alert_type="amount_anomaly",
                     severity="high",
                     title="Unusual Transaction Amount Detected",
-                    description=f"Transaction on {tx.date.strftime('%Y-%m-%d %H:%M')} for {currency} {abs(tx.amount):.2f} at {tx.merchant_name} ({str(tx.predicted_category)} category) is significantly outside your normal spending pattern (statistical outlier)",
+                    description=f"Transaction on {date_strs[i]} for {currency} {amount_strs[i]} at {tx.merchant_name} ({category_names[category_ids[i]]} category) is significantly outside your normal spending pattern (statistical outlier)",
                     transaction_id=tx.id,
                     risk_score=0.8,
                     recommended_action="Verify this transaction is legitimate. Contact your bank if you don't recognize it.",
-                    timestamp=datetime.now(),
+                    timestamp=now,
                     merchant=tx.merchant_name,
-                    amount=abs(tx.amount)
+                    amount=float(abs_amounts[i])
                 ))
-                alerted_transactions[tx.id].append('amount')
+                alerted[tx.id] = bits | _AMOUNT_ALERT
 
         # Frequency anomaly alerts
-        for tx in frequency_anomalies:
-            if tx.id not in alerted_transactions:
-                alerted_transactions[tx.id] = []
-
-            if 'frequency' not in alerted_transactions[tx.id]:
-                alerts.append(SecurityAlert(
+        for i in frequency_idx.tolist():
+            tx = transactions[i]
+            bits = alerted.get(tx.id, 0)
+            if not bits & _FREQUENCY_ALERT:
+                alerts.append(_InternalAlert(
                     alert_type="frequency_anomaly",
                     severity="medium",
                     title="Unusual Transaction Frequency",
-                    description=f"Transaction on {tx.date.strftime('%Y-%m-%d %H:%M')} for LKR {abs(tx.amount):.2f} at {tx.merchant_name}. Unusually high number of transactions at this merchant ({str(tx.predicted_category)} category). This could indicate unauthorized recurring charges.",
+                    description=f"Transaction on {date_strs[i]} for LKR {amount_strs[i]} at {tx.merchant_name}. Unusually high number of transactions at this merchant ({category_names[category_ids[i]]} category). This could indicate unauthorized recurring charges.",
                     transaction_id=tx.id,
                     risk_score=0.6,
                     recommended_action="Review all recent transactions at this merchant. Consider canceling recurring subscriptions if unauthorized.",
-                    timestamp=datetime.now(),
+                    timestamp=now,
                     merchant=tx.merchant_name,
-                    amount=abs(tx.amount)
+                    amount=float(abs_amounts[i])
                 ))
-                alerted_transactions[tx.id].append('frequency')
+                alerted[tx.id] = bits | _FREQUENCY_ALERT
 
         # Location anomaly alerts
-        for tx in location_anomalies:
-            if tx.id not in alerted_transactions:
-                alerted_transactions[tx.id] = []
-
-            if 'location' not in alerted_transactions[tx.id]:
-                alerts.append(SecurityAlert(
+        for i in location_idx.tolist():
+            tx = transactions[i]
+            bits = alerted.get(tx.id, 0)
+            if not bits & _LOCATION_ALERT:
+                alerts.append(_InternalAlert(
                     alert_type="location_anomaly",
                     severity="medium",
                     title="Suspicious Location Pattern",
-                    description=f"Transaction on {tx.date.strftime('%Y-%m-%d %H:%M')} for LKR {abs(tx.amount):.2f} at {tx.merchant_name}. Excessive repetition detected at this location (15+ transactions total). This pattern is unusual and may indicate fraudulent activity.",
+                    description=f"Transaction on {date_strs[i]} for LKR {amount_strs[i]} at {tx.merchant_name}. Excessive repetition detected at this location (15+ transactions total). This pattern is unusual and may indicate fraudulent activity.",
                     transaction_id=tx.id,
                     risk_score=0.65,
                     recommended_action="Verify all transactions at this location. Report suspicious activity to your bank immediately.",
-                    timestamp=datetime.now(),
+                    timestamp=now,
                     merchant=tx.merchant_name,
-                    amount=abs(tx.amount)
+                    amount=float(abs_amounts[i])
                 ))
-                alerted_transactions[tx.id].append('location')
+                alerted[tx.id] = bits | _LOCATION_ALERT
 
         # Time anomaly alerts
-        for tx in time_anomalies:
-            if tx.id not in alerted_transactions:
-                alerted_transactions[tx.id] = []
-
-            if 'time' not in alerted_transactions[tx.id]:
-                alerts.append(SecurityAlert(
+        for i in time_idx.tolist():
+            tx = transactions[i]
+            bits = alerted.get(tx.id, 0)
+            if not bits & _TIME_ALERT:
+                alerts.append(_InternalAlert(
                     alert_type="time_anomaly",
                     severity="high",
                     title="Suspicious Transaction Time",
-                    description=f"Transaction occurred at {tx.date.strftime('%I:%M %p on %A, %B %d')} (between 1:00 AM - 3:00 AM). Transactions at this hour are uncommon and may indicate unauthorized access.",
+                    description=f"Transaction occurred at {tx.date.strftime('%I:%M %p on %A, %B %d')} ({time_window}). Transactions at this hour are uncommon and may indicate unauthorized access.",
                     transaction_id=tx.id,
                     risk_score=0.75,
                     recommended_action="Verify this transaction immediately. If you didn't make it, contact your bank to freeze your card.",
-                    timestamp=datetime.now()
+                    timestamp=now
                 ))
-                alerted_transactions[tx.id].append('time')
+                alerted[tx.id] = bits | _TIME_ALERT
 
         return alerts
 
@@ -360,8 +780,9 @@ class SafetyGuardAgent:
         if not is_new_user or has_seen_recommendations:
             return []
 
+        now = datetime.now()
         recommendations = [
-            SecurityAlert(
+            SecurityAlert.model_construct(
                 alert_type="security_setup",
                 severity="info",
                 title="Enable Account Security Features",
@@ -369,9 +790,9 @@ class SafetyGuardAgent:
                 transaction_id="general",
                 risk_score=0.0,
                 recommended_action="Enable 2FA and use strong, unique passwords",
-                timestamp=datetime.now()
+                timestamp=now
             ),
-            SecurityAlert(
+            SecurityAlert.model_construct(
                 alert_type="fraud_awareness",
                 severity="info",
                 title="Monitor Your Accounts Regularly",
@@ -379,7 +800,7 @@ class SafetyGuardAgent:
                 transaction_id="general",
                 risk_score=0.0,
                 recommended_action="Set up account alerts for transactions",
-                timestamp=datetime.now()
+                timestamp=now
             )
         ]
 
@@ -390,43 +811,64 @@ class SafetyGuardAgent:
         transactions = input_data.classified_transactions
         user_profile = input_data.user_profile
 
-        # Detect anomalies
-        amount_anomalies = self.detect_amount_anomalies(transactions, user_profile)
-        frequency_anomalies = self.detect_frequency_anomalies(transactions, user_profile)
-        location_anomalies = self.detect_location_anomalies(transactions, user_profile)
-        time_anomalies = self.detect_time_anomalies(transactions, user_profile)
+        # Nothing to scan: skip the detectors; only new users get the default recommendations
+        if not transactions:
+            return SafetyGuardAgentOutput(
+                security_alerts=self.generate_default_security_recommendations(user_profile),
+                flagged_transactions=[],
+                risk_score=0.0
+            )
+
+        # Extract the batch once and run every detector over the same arrays
+        amounts, hours, bulk_mask, tx_codes = self._extract_soa(transactions)
+        merchant_ids, category_ids, merchant_names, category_names = self._encode_batch(transactions)
 
-        # Combine all flagged transactions
-        all_flagged = amount_anomalies + frequency_anomalies + location_anomalies + time_anomalies
+        # Derive the profile baselines once for all detectors
+        baselines = self._build_baselines(user_profile)
 
-        # Remove duplicates based on transaction ID
-        seen_ids = set()
-        unique_flagged = []
-        for tx in all_flagged:
-            if tx.id not in seen_ids:
-                unique_flagged.append(tx)
-                seen_ids.add(tx.id)
+        # Detect anomalies in one fused pass over the batch arrays
+        amount_idx, frequency_idx, location_idx, time_idx = self._detect_all(
+            transactions, amounts, hours, bulk_mask, merchant_ids, category_ids,
+            merchant_names, category_names, baselines, user_profile
+        )
+
+        # Combine all flagged transactions in detector order
+        all_flagged = np.concatenate((amount_idx, frequency_idx, location_idx, time_idx))
 
-        # Get currency from user preferences (default to LKR)
-        currency = user_profile.get('preferences', {}).get('currency', 'LKR')
+        # Remove duplicates based on transaction ID, keeping each ID's first occurrence
+        _, first_seen = np.unique(tx_codes[all_flagged], return_index=True)
+        unique_idx = all_flagged[np.sort(first_seen)]
+        unique_flagged = self._select(transactions, unique_idx)
+
+        currency = baselines.currency
 
         # Check spending limits (if defined in user profile)
-        spending_limits = user_profile.get('spending_limits', {})
-        limit_alerts = self.check_spending_limits(transactions, spending_limits, currency)
+        spending_limits = baselines.spending_limits
+        limit_alerts = []
+        if spending_limits:
+            limit_alerts = self._limit_alerts(transactions, spending_limits, currency, category_ids, category_names, amounts)
 
         # Calculate overall risk score
-        risk_score = self.calculate_risk_score(transactions, unique_flagged)
+        risk_score = self.calculate_risk_score(transactions, unique_flagged, amounts[unique_idx], hours[unique_idx])
 
         # Generate security alerts based on specific anomaly types
-        security_alerts = self.generate_security_alerts(
-            unique_flagged,
-            amount_anomalies,
-            frequency_anomalies,
-            location_anomalies,
-            time_anomalies,
-            currency
+        time_window = "between 1:00 AM - 3:00 AM" if baselines.hour_lut is _DEFAULT_HOUR_LUT else "during your unusual hours"
+        internal_alerts = self._anomaly_alerts(
+            transactions,
+            amount_idx,
+            frequency_idx,
+            location_idx,
+            time_idx,
+            currency,
+            amounts,
+            category_ids,
+            category_names,
+            time_window
         )
-        security_alerts.extend(limit_alerts)
+        internal_alerts.extend(limit_alerts)
+
+        # Convert to the public SecurityAlert schema only at the output boundary
+        security_alerts = [alert.to_security_alert() for alert in internal_alerts]
 
         # If NO anomalies detected and user is new, provide general security recommendations
         if not security_alerts and not unique_flagged:
@@ -2,106 +2,268 @@
 Analytics API endpoint - Provides pattern insights and analytics data
 """
 from fastapi import APIRouter, HTTPException, Depends
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime, timedelta
+from collections import Counter, OrderedDict
+import asyncio
+import copy
 import json
+import time
 
-from ..workflows.unified_workflow import UnifiedTransactionWorkflow
+from ..workflows.unified_workflow import UnifiedTransactionWorkflow, get_workflow
 from ..core.database_config import get_db_client
 from ..services.auth_service import get_current_user
 
 router = APIRouter(prefix="/analytics", tags=["analytics"])
 
-@router.get("/patterns/{user_id}")
-async def get_pattern_insights(
+# Workflow results per (user_input, user_id, start_date, end_date), reused while the user's transactions in
+# that range are unchanged: key -> (monotonic store time, transactions version, (workflow_data, transaction_count))
+# Entries are private copies; callers always get their own deep copy
+_ANALYSIS_TTL = 300.0
+_ANALYSIS_CACHE_SIZE = 1024
+# Transaction columns the workflow reads, plus updated_at for the transactions version
+_ANALYSIS_COLUMNS = "date,amount,description,payment_method,merchant_name,category,updated_at"
+# Rows per request when paging through a user's transactions
+_ANALYSIS_PAGE_SIZE = 1000
+_analysis_cache: "OrderedDict[tuple, Tuple[float, tuple, Tuple[Dict[str, Any], int]]]" = OrderedDict()
+
+
+def _filtered_transactions(supabase, columns: str, user_id: str, start_date: Optional[str], end_date: Optional[str], **select_options):
+    """Transactions query for a user and optional date range"""
+    query = supabase.table("transactions").select(columns, **select_options).eq("user_id", user_id)
+    if start_date:
+        query = query.gte("date", start_date)
+    if end_date:
+        query = query.lte("date", end_date)
+    return query
+
+
+def _transactions_version(supabase, user_id: str, start_date: Optional[str], end_date: Optional[str]) -> tuple:
+    """
+    Cheap fingerprint of a user's transactions in a date range: (row count, latest updated_at)
+    Any insert, delete or update in the range changes it
+    """
+    result = (
+        _filtered_transactions(supabase, "updated_at", user_id, start_date, end_date, count="exact")
+        .order("updated_at", desc=True, nullsfirst=False)
+        .limit(1)
+        .execute()
+    )
+    return (result.count, result.data[0]["updated_at"] if result.data else None)
+
+
+def _transactions_page(supabase, user_id: str, start_date: Optional[str], end_date: Optional[str], offset: int,
+                       **select_options) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+    """One page of the user's transactions in the range, newest first, with the row count if requested"""
+    result = _filtered_transactions(
+        supabase, _ANALYSIS_COLUMNS, user_id, start_date, end_date, **select_options
+    ).order("date", desc=True).order("id", desc=True).range(offset, offset + _ANALYSIS_PAGE_SIZE - 1).execute()
+    return result.data or [], result.count
+
+
+async def _fetch_transactions(supabase, user_id: str, start_date: Optional[str], end_date: Optional[str]) -> Tuple[List[Dict[str, Any]], tuple]:
+    """
+    All of the user's transactions in the range (without updated_at), with the transactions version they were read at
+    The first page carries the row count, so the remaining pages are requested at once; the version
+    is derived from the rows themselves rather than from a separate query
+    """
+    first_page, total = await asyncio.to_thread(_transactions_page, supabase, user_id, start_date, end_date, 0, count="exact")
+    pages = [first_page]
+    pages.extend(page for page, _ in await asyncio.gather(*(
+        asyncio.to_thread(_transactions_page, supabase, user_id, start_date, end_date, offset)
+        for offset in range(_ANALYSIS_PAGE_SIZE, total or 0, _ANALYSIS_PAGE_SIZE)
+    )))
+    # Keep paging if rows were added after the count was taken
+    offset = len(pages) * _ANALYSIS_PAGE_SIZE
+    while len(pages[-1]) == _ANALYSIS_PAGE_SIZE:
+        page, _ = await asyncio.to_thread(_transactions_page, supabase, user_id, start_date, end_date, offset)
+        pages.append(page)
+        offset += _ANALYSIS_PAGE_SIZE
+
+    rows = [tx for page in pages for tx in page]
+    # updated_at is only read for the version, so it is dropped from the rows here
+    updates = [updated_at for updated_at in (tx.pop("updated_at", None) for tx in rows) if updated_at is not None]
+    return rows, (len(rows), max(updates, default=None))
+
+
+async def _analyze_user_transactions(
+    supabase,
+    workflow: UnifiedTransactionWorkflow,
     user_id: str,
+    user_input: str,
+    failure_detail: str,
     start_date: Optional[str] = None,
-    end_date: Optional[str] = None,
-    # current_user: dict = Depends(get_current_user)  # Temporarily disabled for testing
-):
-    """Get pattern insights and analytics for user transactions"""
-    try:
-        supabase = await get_db_client()
+    end_date: Optional[str] = None
+) -> Optional[Tuple[Dict[str, Any], int]]:
+    """
+    Run the workflow over the user's transactions in the date range
 
-        # Build query filters
-        query = supabase.table("transactions").select("*").eq("user_id", user_id)
+    Returns (workflow_data, transaction_count), or None when the range has no transactions.
+    A result younger than _ANALYSIS_TTL is reused as long as the range's transactions are unchanged;
+    only then is the version query needed, so a request without a cached result costs no extra round trip.
+    """
+    key = (user_input, user_id, start_date, end_date)
+    cached = _analysis_cache.get(key)
+    if cached is not None and time.monotonic() - cached[0] < _ANALYSIS_TTL:
+        version = await asyncio.to_thread(_transactions_version, supabase, user_id, start_date, end_date)
+        if not version[0]:
+            return None
+        if cached[1] == version:
+            _analysis_cache.move_to_end(key)
+            return copy.deepcopy(cached[2])
 
-        if start_date:
-            query = query.gte("date", start_date)
-        if end_date:
-            query = query.lte("date", end_date)
+    # Get user transactions
+    rows, version = await _fetch_transactions(supabase, user_id, start_date, end_date)
 
-        # Get user transactions
-        result = query.order("date", desc=True).execute()
+    # Only the amount and a missing description need converting to the expected format
+    raw_transactions = [
+        {**tx, "amount": str(tx["amount"]), "description": tx["description"] or ""}
+        for tx in rows
+    ]
+    if not raw_transactions:
+        return None
 
-        if not result.data:
-            return {
-                "patterns": [],
-                "insights": [],
-                "spending_summary": {},
-                "recommendations": [],
-                "security_alerts": []
-            }
+    # Process through the shared workflow to get insights
+    analysis_result = await workflow.execute_workflow(
+        raw_transactions=raw_transactions,
+        conversation_context={"user_id": user_id},
+        user_input=user_input,
+        user_id=user_id
+    )
 
-        # Convert transactions to expected format
-        raw_transactions = []
-        for tx in result.data:
-            raw_transactions.append({
-                "date": tx["date"],
-                "amount": str(tx["amount"]),
-                "description": tx["description"] or "",
-                "payment_method": tx.get("payment_method", "unknown"),
-                "merchant_name": tx.get("merchant_name", ""),
-                "category": tx.get("category", "miscellaneous")
-            })
-
-        # Process through workflow to get insights
-        workflow = UnifiedTransactionWorkflow()
-        analysis_result = await workflow.execute_workflow(
-            raw_transactions=raw_transactions,
-            conversation_context={"user_id": user_id},
-            user_input="Analyze my spending patterns",
-            user_id=user_id
-        )
+    if analysis_result.get("status") != "success":
+        raise HTTPException(status_code=500, detail=failure_detail)
 
-        if analysis_result.get("status") != "success":
-            raise HTTPException(status_code=500, detail="Analysis failed")
+    analysis = (analysis_result["result"], len(raw_transactions))
+    _analysis_cache[key] = (time.monotonic(), version, copy.deepcopy(analysis))
+    _analysis_cache.move_to_end(key)
+    while len(_analysis_cache) > _ANALYSIS_CACHE_SIZE:
+        _analysis_cache.popitem(last=False)
+    return analysis
 
-        workflow_data = analysis_result["result"]
 
-        # Extract and format the data for frontend
-        response_data = {
-            "patterns": {
-                "spending_patterns": workflow_data.get("spending_patterns", {}),
-                "total_income": workflow_data.get("spending_patterns", {}).get("total_income", 0),
-                "total_expenses": workflow_data.get("spending_patterns", {}).get("total_expenses", 0),
-                "net_cashflow": workflow_data.get("spending_patterns", {}).get("net_cashflow", 0),
-                "expenses_by_category": workflow_data.get("spending_patterns", {}).get("expenses_by_category", {}),
-                "category_percentages": workflow_data.get("spending_patterns", {}).get("category_percentages", {})
-            },
-            "insights": workflow_data.get("pattern_insights", []),
-            "recommendations": {
-                "budget_recommendations": workflow_data.get("budget_recommendations", []),
-                "spending_suggestions": workflow_data.get("spending_suggestions", [])
-            },
-            "security_alerts": workflow_data.get("security_alerts", []),
-            "confidence": {
-                "overall": workflow_data.get("pattern_confidence", 0),
-                "pattern_analysis": workflow_data.get("pattern_confidence", 0),
-                "suggestions": workflow_data.get("suggestion_confidence", 0),
-                "security": workflow_data.get("safety_confidence", 0)
-            },
-            "metadata": {
-                "total_transactions": len(raw_transactions),
-                "analysis_date": datetime.now().isoformat(),
-                "date_range": {
-                    "start": start_date,
-                    "end": end_date
-                }
+def _pattern_insights_response(
+    analysis: Optional[Tuple[Dict[str, Any], int]],
+    start_date: Optional[str],
+    end_date: Optional[str]
+) -> Dict[str, Any]:
+    """Pattern insights payload for the frontend from an analysis result"""
+    if analysis is None:
+        return {
+            "patterns": [],
+            "insights": [],
+            "spending_summary": {},
+            "recommendations": [],
+            "security_alerts": []
+        }
+
+    workflow_data, transaction_count = analysis
+    spending_patterns = workflow_data.get("spending_patterns", {})
+    pattern_confidence = workflow_data.get("pattern_confidence", 0)
+
+    # Extract and format the data for frontend
+    return {
+        "patterns": {
+            "spending_patterns": spending_patterns,
+            "total_income": spending_patterns.get("total_income", 0),
+            "total_expenses": spending_patterns.get("total_expenses", 0),
+            "net_cashflow": spending_patterns.get("net_cashflow", 0),
+            "expenses_by_category": spending_patterns.get("expenses_by_category", {}),
+            "category_percentages": spending_patterns.get("category_percentages", {})
+        },
+        "insights": workflow_data.get("pattern_insights", []),
+        "recommendations": {
+            "budget_recommendations": workflow_data.get("budget_recommendations", []),
+            "spending_suggestions": workflow_data.get("spending_suggestions", [])
+        },
+        "security_alerts": workflow_data.get("security_alerts", []),
+        "confidence": {
+            "overall": pattern_confidence,
+            "pattern_analysis": pattern_confidence,
+            "suggestions": workflow_data.get("suggestion_confidence", 0),
+            "security": workflow_data.get("safety_confidence", 0)
+        },
+        "metadata": {
+            "total_transactions": transaction_count,
+            "analysis_date": datetime.now().isoformat(),
+            "date_range": {
+                "start": start_date,
+                "end": end_date
             }
         }
+    }
+
 
-        return response_data
+def _suggestions_response(
+    analysis: Optional[Tuple[Dict[str, Any], int]],
+    suggestion_type: Optional[str],
+    priority: Optional[str]
+) -> Dict[str, Any]:
+    """Suggestions payload for the frontend from an analysis result"""
+    if analysis is None:
+        # Return empty suggestions for new users - no hardcoded data
+        return {
+            "suggestions": [],
+            "total_count": 0,
+            "high_priority_count": 0,
+            "message": "No transactions found. Upload transactions to generate personalized suggestions."
+        }
+
+    workflow_data, _ = analysis
+
+    # Combine all suggestions
+    all_suggestions = []
+    all_suggestions.extend(workflow_data.get("budget_recommendations", []))
+    all_suggestions.extend(workflow_data.get("spending_suggestions", []))
+
+    # Filter by type and priority if specified
+    filtered_suggestions = all_suggestions
+    if suggestion_type or priority:
+        filtered_suggestions = [
+            s for s in all_suggestions
+            if (not suggestion_type or s.get("suggestion_type") == suggestion_type)
+            and (not priority or s.get("priority") == priority)
+        ]
+
+    # Count by priority
+    priority_counts = Counter(s.get("priority") for s in all_suggestions)
+
+    return {
+        "suggestions": filtered_suggestions,
+        "total_count": len(all_suggestions),
+        "filtered_count": len(filtered_suggestions),
+        "priority_breakdown": {
+            "high": priority_counts["high"],
+            "medium": priority_counts["medium"],
+            "low": priority_counts["low"]
+        },
+        "confidence": workflow_data.get("suggestion_confidence", 0),
+        "generated_at": datetime.now().isoformat()
+    }
+
+
+@router.get("/patterns/{user_id}")
+async def get_pattern_insights(
+    user_id: str,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    workflow: UnifiedTransactionWorkflow = Depends(get_workflow),
+    # current_user: dict = Depends(get_current_user)  # Temporarily disabled for testing
+):
+    """Get pattern insights and analytics for user transactions"""
+    try:
+        supabase = await get_db_client()
+
+        analysis = await _analyze_user_transactions(
+            supabase,
+            workflow,
+            user_id,
+            user_input="Analyze my spending patterns",
+            failure_detail="Analysis failed",
+            start_date=start_date,
+            end_date=end_date
+        )
+        return _pattern_insights_response(analysis, start_date, end_date)
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get analytics: {str(e)}")
@@ -111,6 +273,7 @@ async def get_suggestions(
     user_id: str,
     suggestion_type: Optional[str] = None,
     priority: Optional[str] = None,
+    workflow: UnifiedTransactionWorkflow = Depends(get_workflow),
     # current_user: dict = Depends(get_current_user)  # Temporarily disabled for testing
 ):
     """Get personalized suggestions for the user"""
@@ -119,86 +282,65 @@ async def get_suggestions(
 
         # Get recent transactions for analysis
         recent_date = (datetime.now() - timedelta(days=90)).strftime("%Y-%m-%d")
-        result = supabase.table("transactions").select("*").eq("user_id", user_id).gte("date", recent_date).execute()
-
-        if not result.data:
-            # Return empty suggestions for new users - no hardcoded data
-            return {
-                "suggestions": [],
-                "total_count": 0,
-                "high_priority_count": 0,
-                "message": "No transactions found. Upload transactions to generate personalized suggestions."
-            }
-
-        # Convert and analyze transactions
-        raw_transactions = []
-        for tx in result.data:
-            raw_transactions.append({
-                "date": tx["date"],
-                "amount": str(tx["amount"]),
-                "description": tx["description"] or "",
-                "payment_method": tx.get("payment_method", "unknown"),
-                "merchant_name": tx.get("merchant_name", ""),
-                "category": tx.get("category", "miscellaneous")
-            })
-
-        # Get suggestions from workflow
-        workflow = UnifiedTransactionWorkflow()
-        analysis_result = await workflow.execute_workflow(
-            raw_transactions=raw_transactions,
-            conversation_context={"user_id": user_id},
+        analysis = await _analyze_user_transactions(
+            supabase,
+            workflow,
+            user_id,
             user_input="Give me financial suggestions",
-            user_id=user_id
+            failure_detail="Suggestion analysis failed",
+            start_date=recent_date
         )
+        return _suggestions_response(analysis, suggestion_type, priority)
 
-        if analysis_result.get("status") != "success":
-            raise HTTPException(status_code=500, detail="Suggestion analysis failed")
-
-        workflow_data = analysis_result["result"]
-
-        # Combine all suggestions
-        all_suggestions = []
-        all_suggestions.extend(workflow_data.get("budget_recommendations", []))
-        all_suggestions.extend(workflow_data.get("spending_suggestions", []))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to get suggestions: {str(e)}")
 
-        # Filter by type and priority if specified
-        filtered_suggestions = all_suggestions
-        if suggestion_type:
-            filtered_suggestions = [s for s in filtered_suggestions if s.get("suggestion_type") == suggestion_type]
-        if priority:
-            filtered_suggestions = [s for s in filtered_suggestions if s.get("priority") == priority]
+@router.get("/dashboard/{user_id}")
+async def get_dashboard(
+    user_id: str,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    suggestion_type: Optional[str] = None,
+    priority: Optional[str] = None,
+    workflow: UnifiedTransactionWorkflow = Depends(get_workflow),
+    # current_user: dict = Depends(get_current_user)  # Temporarily disabled for testing
+):
+    """
+    Get pattern insights and suggestions for the user from a single workflow run
 
-        # Count by priority
-        high_priority_count = len([s for s in all_suggestions if s.get("priority") == "high"])
-        medium_priority_count = len([s for s in all_suggestions if s.get("priority") == "medium"])
-        low_priority_count = len([s for s in all_suggestions if s.get("priority") == "low"])
+    Both payloads come from the same analysis as /patterns, so the suggestions cover the
+    requested date range rather than the last 90 days used by /suggestions.
+    """
+    try:
+        supabase = await get_db_client()
 
+        analysis = await _analyze_user_transactions(
+            supabase,
+            workflow,
+            user_id,
+            user_input="Analyze my spending patterns",
+            failure_detail="Analysis failed",
+            start_date=start_date,
+            end_date=end_date
+        )
         return {
-            "suggestions": filtered_suggestions,
-            "total_count": len(all_suggestions),
-            "filtered_count": len(filtered_suggestions),
-            "priority_breakdown": {
-                "high": high_priority_count,
-                "medium": medium_priority_count,
-                "low": low_priority_count
-            },
-            "confidence": workflow_data.get("suggestion_confidence", 0),
-            "generated_at": datetime.now().isoformat()
+            "patterns": _pattern_insights_response(analysis, start_date, end_date),
+            "suggestions": _suggestions_response(analysis, suggestion_type, priority)
         }
 
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to get suggestions: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to get dashboard: {str(e)}")
 
 @router.post("/process-transactions/{user_id}")
 async def process_transactions_for_analysis(
     user_id: str,
     transactions: List[Dict[str, Any]],
-    current_user: dict = Depends(get_current_user)
+    current_user: dict = Depends(get_current_user),
+    workflow: UnifiedTransactionWorkflow = Depends(get_workflow)
 ):
     """Process a batch of transactions and return full analytics"""
     try:
-        # Process transactions through workflow
-        workflow = UnifiedTransactionWorkflow()
+        # Process transactions through the shared workflow
         result = await workflow.execute_workflow(
             raw_transactions=transactions,
             conversation_context={"user_id": user_id},
@@ -1,28 +1,25 @@
 """FastAPI application for FinTrack transaction processing"""
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from datetime import datetime
 import uvicorn
+import json
 import logging
-import sys
-import os
 
-# Add parent directory to path for imports
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
-
-from src.workflows.unified_workflow import WorkflowMode, get_workflow_instance
-from src.schemas.transaction_schemas import RawTransaction
+from ..workflows.unified_workflow import WorkflowMode, get_workflow_instance
+from ..schemas.transaction_schemas import RawTransaction
 
 # Import routers
-from src.routes.transactions import router as transactions_router
-from src.routes.auth import router as auth_router
-from src.routes.analytics import router as analytics_router
-from src.routes.suggestions import router as suggestions_router
-from src.routes.workflow import router as workflow_router
-from src.api.analytics import router as ai_analytics_router
-from src.api.prediction_results import router as prediction_results_router
-from src.api.user_settings import router as user_settings_router
+from ..routes.transactions import router as transactions_router
+from ..routes.auth import router as auth_router
+from ..routes.analytics import router as analytics_router
+from ..routes.suggestions import router as suggestions_router
+from ..routes.workflow import router as workflow_router
+from .analytics import router as ai_analytics_router
+from .prediction_results import router as prediction_results_router
+from .user_settings import router as user_settings_router
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -32,7 +29,8 @@ logger = logging.getLogger(__name__)
 app = FastAPI(
     title="FinTrack API",
     description="Financial Transaction Analysis and Processing System with LangGraph",
-    version="2.0.0"
+    version="2.0.0",
+    default_response_class=ORJSONResponse
 )
 
 # Add CORS middleware
@@ -173,18 +171,21 @@ async def process_transaction(
         logger.error(f"Transaction processing error: {e}")
         raise HTTPException(status_code=500, detail=f"Transaction processing failed: {str(e)}")
 
+# The workflow modes are fixed for the life of the process, so the response is encoded once
+_WORKFLOW_MODES_BODY = json.dumps({
+    "status": "success",
+    "modes": [{"value": mode.value, "name": mode.value.replace("_", " ").title()} for mode in WorkflowMode],
+    "default_mode": "full_pipeline"
+}, separators=(",", ":")).encode("utf-8")
+
 @app.get("/api/v1/workflow/modes")
 async def get_workflow_modes():
     """Get available workflow modes"""
-    try:
-        modes = [{"value": mode.value, "name": mode.value.replace("_", " ").title()} for mode in WorkflowMode]
-        return {
-            "status": "success",
-            "modes": modes,
-            "default_mode": "full_pipeline"
-        }
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to get workflow modes: {str(e)}")
+    return Response(
+        content=_WORKFLOW_MODES_BODY,
+        media_type="application/json",
+        headers={"Cache-Control": "public, max-age=3600"}
+    )
 
 @app.get("/api/v1/workflow/status")
 async def get_workflow_status():
@@ -219,9 +220,9 @@ async def get_agent_performance():
         raise HTTPException(status_code=500, detail=f"Failed to get agent performance: {str(e)}")
 
 if __name__ == "__main__":
-    # Run the application
+    # Run the application (python -m src.api.main from the project root)
     uvicorn.run(
-        "main:app",
+        "src.api.main:app",
         host="0.0.0.0",
         port=8000,
         reload=True,
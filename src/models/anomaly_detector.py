@@ -1,13 +1,24 @@
 """Anomaly detection model for identifying suspicious transactions"""
 
 import numpy as np
+from functools import lru_cache
 from typing import List, Dict, Any, Tuple
+from sklearn.base import clone
 from sklearn.ensemble import IsolationForest
 from sklearn.preprocessing import StandardScaler
 import joblib
 import os
 
 
+@lru_cache(maxsize=1)
+def _load_saved_model(path: str, mtime: float) -> Dict[str, Any]:
+    """
+    Load a saved detector bundle once per process
+    Keyed by modification time so a retrained model on disk is picked up
+    """
+    return joblib.load(path)
+
+
 class AnomalyDetector:
     """Machine Learning model for detecting anomalous transactions"""
     
@@ -28,6 +39,10 @@ class AnomalyDetector:
     
     def train(self, X: np.ndarray, feature_names: List[str] = None) -> Dict[str, Any]:
         """Train the anomaly detection model"""
+        # Refit fresh copies so a model shared through the load cache is never mutated
+        self.model = clone(self.model)
+        self.scaler = clone(self.scaler)
+
         # Scale features
         X_scaled = self.scaler.fit_transform(X)
         
@@ -76,6 +91,18 @@ class AnomalyDetector:
         
         return is_anomaly, risk_scores
     
+    def predict_mask(self, X: np.ndarray) -> np.ndarray:
+        """Predict anomalies for a whole feature matrix as one boolean array (True = anomaly)"""
+        if not self.is_trained:
+            raise ValueError("Model has not been trained yet")
+        
+        return self.model.predict(self.scaler.transform(X)) == -1
+    
+    @property
+    def n_features(self) -> int:
+        """Number of features the trained model expects (0 when untrained)"""
+        return getattr(self.model, 'n_features_in_', 0) if self.is_trained else 0
+    
     def detect_amount_anomalies(self, amounts: List[float], user_profile: Dict[str, Any]) -> List[bool]:
         """Detect anomalies based on transaction amounts"""
         avg_amount = user_profile.get('avg_monthly_spending', 1000) / 30  # Daily average
@@ -155,7 +182,7 @@ class AnomalyDetector:
     def load_model(self):
         """Load a pre-trained model from disk"""
         if os.path.exists(self.model_path):
-            saved_data = joblib.load(self.model_path)
+            saved_data = _load_saved_model(self.model_path, os.path.getmtime(self.model_path))
             self.model = saved_data['model']
             self.scaler = saved_data['scaler']
             self.feature_names = saved_data['feature_names']
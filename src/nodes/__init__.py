@@ -70,6 +70,8 @@ class TransactionProcessingNodes:
                 config = {}
 
         self.config = config or {}
+        # Suggestion caches kept across workflow runs; created by the suggestion node on first use
+        self.suggestion_cache = None
 
         # Initialize agents with safe configuration
         try:
@@ -1129,10 +1131,10 @@ class TransactionProcessingNodes:
         """
         Suggestion node - generates budget recommendations and spending advice
         """
-        print(f"SUGGESTION: Starting suggestion generation")
+        logger.debug("SUGGESTION: Starting suggestion generation")
 
         try:
-            from ..agents.suggestion_agent import SuggestionAgent, SuggestionAgentInput
+            from ..agents.suggestion_agent import SuggestionAgent, SuggestionAgentInput, SuggestionCache
             from ..schemas.transaction_schemas import PatternInsight
             from ..services.transaction_service import TransactionService
             from supabase import create_client
@@ -1149,7 +1151,10 @@ class TransactionProcessingNodes:
             else:
                 transaction_service = None
 
-            suggestion_agent = SuggestionAgent(transaction_service=transaction_service)
+            # Agents are built per run; the cache is shared through the nodes so runs can reuse it
+            if self.suggestion_cache is None:
+                self.suggestion_cache = SuggestionCache()
+            suggestion_agent = SuggestionAgent(transaction_service=transaction_service, cache=self.suggestion_cache)
 
             # Get pattern insights and prepare input
             pattern_insights_data = state.get('pattern_insights', {})
@@ -1199,12 +1204,16 @@ class TransactionProcessingNodes:
             # Get user_id from state
             user_id = state.get('user_id', 'default_user')
 
+            # This run brings new transactions, so the user's cached profile and suggestions are stale
+            if transactions:
+                self.suggestion_cache.invalidate_user(user_id)
+
             # Prepare user preferences for the agent
             # The agent will query the database for accurate transaction count
             # We don't set transaction_count here to avoid confusion
             if 'transaction_count' in user_preferences:
                 # Remove batch-specific count - let agent query database for accurate total
-                print(f"SUGGESTION NODE: Removing batch transaction_count, agent will query database")
+                logger.debug("SUGGESTION NODE: Removing batch transaction_count, agent will query database")
                 user_preferences.pop('transaction_count', None)
 
             # Create input for suggestion agent
@@ -1235,9 +1244,10 @@ class TransactionProcessingNodes:
 
             # Get all personalized suggestions from agent
             all_suggestions = result.suggestions
-            print(f"SUGGESTION: Agent returned {len(all_suggestions)} personalized suggestions")
-            for sugg in all_suggestions[:3]:
-                print(f"  - {sugg.title} ({sugg.suggestion_type})")
+            logger.debug("SUGGESTION: Agent returned %d personalized suggestions", len(all_suggestions))
+            if logger.isEnabledFor(logging.DEBUG):
+                for sugg in all_suggestions[:3]:
+                    logger.debug("  - %s (%s)", sugg.title, sugg.suggestion_type)
 
             # Store suggestions in appropriate state fields
             state['budget_recommendations'] = [suggestion.dict() for suggestion in all_suggestions if 'budget' in suggestion.title.lower() or suggestion.suggestion_type in ['budget_adjustment', 'budget_planning']]
@@ -1246,13 +1256,12 @@ class TransactionProcessingNodes:
             state['savings_opportunities'] = result.savings_opportunities
             state['suggestion_confidence'] = result.confidence_score
 
-            print(f"SUGGESTION: Storing in state:")
-            print(f"  - budget_recommendations: {len(state.get('budget_recommendations', []))} items")
-            print(f"  - spending_suggestions: {len(state.get('spending_suggestions', []))} items")
-            print(f"  - savings_opportunities: {len(state.get('savings_opportunities', []))} items")
-            print(f"  - suggestion_confidence: {state.get('suggestion_confidence')}")
-
-            print(f"SUGGESTION: Generated {len(all_suggestions)} total suggestions ({len(state['budget_recommendations'])} budget, {len(state['spending_suggestions'])} spending)")
+            logger.debug("SUGGESTION: Storing in state: budget_recommendations=%d, spending_suggestions=%d, "
+                         "savings_opportunities=%d, suggestion_confidence=%s",
+                         len(state['budget_recommendations']), len(state['spending_suggestions']),
+                         len(state['savings_opportunities']), state['suggestion_confidence'])
+            logger.info("SUGGESTION: Generated %d total suggestions (%d budget, %d spending)",
+                        len(all_suggestions), len(state['budget_recommendations']), len(state['spending_suggestions']))
 
             # Add to processing history
             processing_entry = {
@@ -1289,7 +1298,7 @@ class TransactionProcessingNodes:
         print(f"SAFETY GUARD: Starting security validation")
 
         try:
-            from ..agents.safety_guard_agent import SafetyGuardAgent
+            from ..agents.safety_guard_agent import SafetyGuardAgent, SafetyGuardAgentInput
 
             state['current_stage'] = ProcessingStage.SAFETY_GUARD
             safety_agent = SafetyGuardAgent()
@@ -1306,8 +1315,6 @@ class TransactionProcessingNodes:
 
             # Always use SafetyGuardAgent for both transactions and baseline security checks
             # The agent handles new user recommendations internally
-            from ..agents.safety_guard_agent import SafetyGuardAgentInput
-
             # Prepare user profile with new user information
             user_profile = state.get('user_profile', {})
 
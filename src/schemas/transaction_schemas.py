@@ -1,6 +1,7 @@
 """Transaction data schemas using Pydantic"""
 
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple
+from dataclasses import dataclass
 from datetime import datetime
 from pydantic import BaseModel, Field
 from enum import Enum
@@ -151,3 +152,127 @@ class SecurityAlert(BaseModel):
     risk_score: float = Field(description="Risk score for this alert")
     recommended_action: str = Field(description="Recommended action for user")
     timestamp: datetime = Field(default_factory=datetime.now, description="Alert generation timestamp")
+
+
+@dataclass(slots=True, frozen=True)
+class BudgetAlert:
+    """Budget threshold violation produced by the recommendation engine"""
+    type: str
+    category: str
+    title: str
+    description: str
+    priority: str
+    amount_exceeded: float
+    percentage_exceeded: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        # Built directly: the fields are flat, so asdict's recursive copy is wasted work
+        return {
+            'type': self.type,
+            'category': self.category,
+            'title': self.title,
+            'description': self.description,
+            'priority': self.priority,
+            'amount_exceeded': self.amount_exceeded,
+            'percentage_exceeded': self.percentage_exceeded
+        }
+
+
+@dataclass(slots=True, frozen=True)
+class SubscriptionAlert:
+    """Recurring subscription flagged for review by the recommendation engine"""
+    type: str
+    title: str
+    description: str
+    priority: str
+    merchant: Optional[str]
+    monthly_cost: float
+    annual_cost: float
+    action_items: Tuple[str, ...]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'type': self.type,
+            'title': self.title,
+            'description': self.description,
+            'priority': self.priority,
+            'merchant': self.merchant,
+            'monthly_cost': self.monthly_cost,
+            'annual_cost': self.annual_cost,
+            'action_items': list(self.action_items)
+        }
+
+
+@dataclass(slots=True, frozen=True)
+class SavingsOpportunity:
+    """Category savings opportunity produced by the recommendation engine"""
+    type: str
+    category: str
+    title: str
+    description: str
+    priority: str
+    potential_savings: float
+    tips: Tuple[str, ...]
+    current_spending: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'type': self.type,
+            'category': self.category,
+            'title': self.title,
+            'description': self.description,
+            'priority': self.priority,
+            'potential_savings': self.potential_savings,
+            'tips': list(self.tips),
+            'current_spending': self.current_spending
+        }
+
+
+@dataclass(slots=True, frozen=True)
+class SpendingReduction:
+    """Spending reduction suggestion produced by the recommendation engine"""
+    type: str
+    title: str
+    description: str
+    priority: str
+    potential_savings: float
+    merchant: Optional[str] = None
+    monthly_cost: Optional[float] = None
+    action_items: Tuple[str, ...] = ()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'type': self.type,
+            'title': self.title,
+            'description': self.description,
+            'priority': self.priority,
+            'potential_savings': self.potential_savings,
+            'merchant': self.merchant,
+            'monthly_cost': self.monthly_cost,
+            'action_items': list(self.action_items)
+        }
+
+
+@dataclass(slots=True, frozen=True)
+class BudgetAdjustment:
+    """Budget threshold adjustment recommended by the recommendation engine"""
+    type: str
+    category: str
+    title: str
+    description: str
+    priority: str
+    current_budget: float
+    suggested_budget: float
+    reason: str
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'type': self.type,
+            'category': self.category,
+            'title': self.title,
+            'description': self.description,
+            'priority': self.priority,
+            'current_budget': self.current_budget,
+            'suggested_budget': self.suggested_budget,
+            'reason': self.reason
+        }
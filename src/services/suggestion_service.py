@@ -163,7 +163,7 @@ class SuggestionService:
             category=category or "all",
             current_spending=abs(current_spending),
             optimal_spending=abs(current_spending) * Decimal("0.8"),  # Target 20% reduction
-            optimization_strategies=strategies,
+            optimization_strategies=[strategy.to_dict() for strategy in strategies],
             impact_assessment={
                 "savings_potential": str(abs(current_spending) * Decimal("0.2")),
                 "difficulty": "medium",
@@ -1,8 +1,12 @@
 """Recommendation engine for generating financial suggestions"""
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Callable, Iterable, TypeVar
 from enum import Enum
 
+from ..schemas.transaction_schemas import (
+    BudgetAlert, SubscriptionAlert, SavingsOpportunity, SpendingReduction, BudgetAdjustment
+)
+
 
 class SuggestionType(str, Enum):
     """Types of financial suggestions"""
@@ -21,6 +25,18 @@ class SuggestionPriority(str, Enum):
     CRITICAL = "critical"
 
 
+T = TypeVar('T')
+
+
+# Rank used when ordering suggestions (higher first)
+_PRIORITY_ORDER = {
+    SuggestionPriority.CRITICAL: 4,
+    SuggestionPriority.HIGH: 3,
+    SuggestionPriority.MEDIUM: 2,
+    SuggestionPriority.LOW: 1
+}
+
+
 class RecommendationEngine:
     """Engine for generating financial recommendations and suggestions"""
 
@@ -33,7 +49,7 @@ class RecommendationEngine:
             'entertainment': 150
         }
 
-    def generate_budget_alerts(self, insights: List[Dict[str, Any]], thresholds: Dict[str, float]) -> List[Dict[str, Any]]:
+    def generate_budget_alerts(self, insights: List[Dict[str, Any]], thresholds: Dict[str, float]) -> List[BudgetAlert]:
         """Generate budget alerts based on spending insights"""
         alerts = []
 
@@ -47,19 +63,19 @@ class RecommendationEngine:
                     overspend_amount = spike_amount - threshold
                     overspend_percent = (overspend_amount / threshold * 100) if threshold > 0 else 0
 
-                    alerts.append({
-                        'type': SuggestionType.BUDGET_ALERT,
-                        'category': category,
-                        'title': f"Budget Alert: {category.replace('_', ' ').title()}",
-                        'description': f'You have exceeded your {category} budget by {overspend_amount:.2f} ({overspend_percent:.1f}%)',
-                        'priority': SuggestionPriority.HIGH if overspend_percent > 50 else SuggestionPriority.MEDIUM,
-                        'amount_exceeded': overspend_amount,
-                        'percentage_exceeded': overspend_percent
-                    })
+                    alerts.append(BudgetAlert(
+                        type=SuggestionType.BUDGET_ALERT,
+                        category=category,
+                        title=f"Budget Alert: {category.replace('_', ' ').title()}",
+                        description=f'You have exceeded your {category} budget by {overspend_amount:.2f} ({overspend_percent:.1f}%)',
+                        priority=SuggestionPriority.HIGH if overspend_percent > 50 else SuggestionPriority.MEDIUM,
+                        amount_exceeded=overspend_amount,
+                        percentage_exceeded=overspend_percent
+                    ))
 
         return alerts
 
-    def generate_spending_reduction_suggestions(self, insights: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def generate_spending_reduction_suggestions(self, insights: List[Dict[str, Any]]) -> List[SpendingReduction]:
         """Generate suggestions for reducing spending"""
         suggestions = []
 
@@ -68,18 +84,18 @@ class RecommendationEngine:
 
             if insight.get('insight_type') == 'habit':
                 if 'weekend' in insight.get('description', '').lower():
-                    suggestions.append({
-                        'type': SuggestionType.SPENDING_REDUCTION,
-                        'title': "Reduce Weekend Spending",
-                        'description': "Consider planning weekend activities with a budget to avoid overspending",
-                        'priority': SuggestionPriority.MEDIUM,
-                        'potential_savings': metadata.get('weekend', 0) * 0.2,  # Assume 20% reduction potential
-                        'action_items': [
+                    suggestions.append(SpendingReduction(
+                        type=SuggestionType.SPENDING_REDUCTION,
+                        title="Reduce Weekend Spending",
+                        description="Consider planning weekend activities with a budget to avoid overspending",
+                        priority=SuggestionPriority.MEDIUM,
+                        potential_savings=metadata.get('weekend', 0) * 0.2,  # Assume 20% reduction potential
+                        action_items=(
                             "Set a weekend spending limit",
                             "Plan free or low-cost activities",
                             "Cook at home instead of dining out"
-                        ]
-                    })
+                        )
+                    ))
 
             elif insight.get('insight_type') == 'recurring':
                 frequency = metadata.get('frequency_days', 0)
@@ -87,19 +103,19 @@ class RecommendationEngine:
 
                 if frequency <= 30 and amount > 5:  # Any recurring expense over $5
                     monthly_cost = amount * (30 / frequency) if frequency > 0 else 0
-                    suggestions.append({
-                        'type': SuggestionType.SPENDING_REDUCTION,
-                        'title': f"Review Recurring Expense: {metadata.get('merchant', 'Unknown')}",
-                        'description': f"This recurring expense costs {monthly_cost:.2f}/month. Consider if it's necessary.",
-                        'priority': SuggestionPriority.MEDIUM if amount > 20 else SuggestionPriority.LOW,
-                        'potential_savings': monthly_cost * 0.5,  # Assume 50% could be saved if eliminated
-                        'merchant': metadata.get('merchant'),
-                        'monthly_cost': monthly_cost
-                    })
+                    suggestions.append(SpendingReduction(
+                        type=SuggestionType.SPENDING_REDUCTION,
+                        title=f"Review Recurring Expense: {metadata.get('merchant', 'Unknown')}",
+                        description=f"This recurring expense costs {monthly_cost:.2f}/month. Consider if it's necessary.",
+                        priority=SuggestionPriority.MEDIUM if amount > 20 else SuggestionPriority.LOW,
+                        potential_savings=monthly_cost * 0.5,  # Assume 50% could be saved if eliminated
+                        merchant=metadata.get('merchant'),
+                        monthly_cost=monthly_cost
+                    ))
 
         return suggestions
 
-    def generate_subscription_alerts(self, insights: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def generate_subscription_alerts(self, insights: List[Dict[str, Any]]) -> List[SubscriptionAlert]:
         """Generate alerts about subscription services"""
         alerts = []
 
@@ -115,24 +131,24 @@ class RecommendationEngine:
                     frequency = metadata.get('frequency_days', 0)
                     annual_cost = amount * (365 / frequency) if frequency > 0 else 0
 
-                    alerts.append({
-                        'type': SuggestionType.SUBSCRIPTION_ALERT,
-                        'title': f"Subscription Review: {metadata.get('merchant', 'Unknown')}",
-                        'description': f"Annual cost: {annual_cost:.2f}. Consider if you're getting value from this subscription.",
-                        'priority': SuggestionPriority.LOW if annual_cost < 100 else SuggestionPriority.MEDIUM,
-                        'merchant': metadata.get('merchant'),
-                        'monthly_cost': amount * (30 / frequency) if frequency > 0 else 0,
-                        'annual_cost': annual_cost,
-                        'action_items': [
+                    alerts.append(SubscriptionAlert(
+                        type=SuggestionType.SUBSCRIPTION_ALERT,
+                        title=f"Subscription Review: {metadata.get('merchant', 'Unknown')}",
+                        description=f"Annual cost: {annual_cost:.2f}. Consider if you're getting value from this subscription.",
+                        priority=SuggestionPriority.LOW if annual_cost < 100 else SuggestionPriority.MEDIUM,
+                        merchant=metadata.get('merchant'),
+                        monthly_cost=amount * (30 / frequency) if frequency > 0 else 0,
+                        annual_cost=annual_cost,
+                        action_items=(
                             "Review usage frequency",
                             "Check for family/shared plans",
                             "Consider canceling if unused"
-                        ]
-                    })
+                        )
+                    ))
 
         return alerts
 
-    def generate_savings_opportunities(self, insights: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    def generate_savings_opportunities(self, insights: List[Dict[str, Any]]) -> List[SavingsOpportunity]:
         """Identify potential savings opportunities"""
         opportunities = []
 
@@ -149,16 +165,16 @@ class RecommendationEngine:
             if amount > 200:  # Significant spending
                 savings_tips = self._get_category_savings_tips(category)
 
-                opportunities.append({
-                    'type': SuggestionType.SAVINGS_OPPORTUNITY,
-                    'category': category,
-                    'title': f"Save on {category.replace('_', ' ').title()}",
-                    'description': f"You spent {amount:.2f} on {category}. Here are ways to save:",
-                    'priority': SuggestionPriority.LOW,
-                    'potential_savings': amount * 0.15,  # Assume 15% savings potential
-                    'tips': savings_tips,
-                    'current_spending': amount
-                })
+                opportunities.append(SavingsOpportunity(
+                    type=SuggestionType.SAVINGS_OPPORTUNITY,
+                    category=category,
+                    title=f"Save on {category.replace('_', ' ').title()}",
+                    description=f"You spent {amount:.2f} on {category}. Here are ways to save:",
+                    priority=SuggestionPriority.LOW,
+                    potential_savings=amount * 0.15,  # Assume 15% savings potential
+                    tips=tuple(savings_tips),
+                    current_spending=amount
+                ))
 
         return opportunities
 
@@ -207,23 +223,40 @@ class RecommendationEngine:
         """
         return []
 
-    def prioritize_suggestions(self, suggestions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """Sort suggestions by priority and potential impact"""
-        priority_order = {
-            SuggestionPriority.CRITICAL: 4,
-            SuggestionPriority.HIGH: 3,
-            SuggestionPriority.MEDIUM: 2,
-            SuggestionPriority.LOW: 1
-        }
+    @staticmethod
+    def priority_rank(priority: str) -> int:
+        """Numeric rank of a priority level (higher first; unknown levels rank last)"""
+        return _PRIORITY_ORDER.get(priority, 0)
+
+    @classmethod
+    def rank_by_priority(cls, items: Iterable[T], priority_of: Callable[[T], str],
+                         savings_of: Callable[[T], float]) -> List[T]:
+        """
+        Order items by priority (critical, high, medium, low, then unknown levels), then by
+        potential savings, both descending; ties keep their input order
+        With only a handful of priority levels it is cheaper to partition into buckets and
+        sort each small bucket by savings than to sort the whole list
+        """
+        buckets: Dict[int, List[T]] = {}
+        for item in items:
+            buckets.setdefault(cls.priority_rank(priority_of(item)), []).append(item)
 
-        def sort_key(suggestion):
-            priority_score = priority_order.get(suggestion.get('priority'), 0)
-            savings_score = suggestion.get('potential_savings', 0) / 100  # Normalize savings
-            return (priority_score, savings_score)
+        ranked: List[T] = []
+        for rank in sorted(buckets, reverse=True):
+            bucket = buckets[rank]
+            bucket.sort(key=lambda item: -(savings_of(item) or 0))
+            ranked.extend(bucket)
+        return ranked
 
-        return sorted(suggestions, key=sort_key, reverse=True)
+    def prioritize_suggestions(self, suggestions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Sort suggestions by priority and potential impact"""
+        return self.rank_by_priority(
+            suggestions,
+            lambda suggestion: suggestion.get('priority'),
+            lambda suggestion: suggestion.get('potential_savings', 0)
+        )
 
-    def generate_budget_recommendations(self, insights: List[Dict[str, Any]], current_thresholds: Dict[str, float]) -> List[Dict[str, Any]]:
+    def generate_budget_recommendations(self, insights: List[Dict[str, Any]], current_thresholds: Dict[str, float]) -> List[BudgetAdjustment]:
         """Generate budget adjustment recommendations"""
         recommendations = []
 
@@ -241,30 +274,30 @@ class RecommendationEngine:
             if actual_spending > current_budget * 1.2:  # Consistently over budget
                 suggested_budget = actual_spending * 1.1  # 10% buffer
 
-                recommendations.append({
-                    'type': SuggestionType.BUDGET_ADJUSTMENT,
-                    'category': category,
-                    'title': f"Adjust {category.replace('_', ' ').title()} Budget",
-                    'description': f"Consider increasing budget from ${current_budget} to ${suggested_budget:.2f}",
-                    'priority': SuggestionPriority.MEDIUM,
-                    'current_budget': current_budget,
-                    'suggested_budget': suggested_budget,
-                    'reason': "Consistently exceeding current budget"
-                })
+                recommendations.append(BudgetAdjustment(
+                    type=SuggestionType.BUDGET_ADJUSTMENT,
+                    category=category,
+                    title=f"Adjust {category.replace('_', ' ').title()} Budget",
+                    description=f"Consider increasing budget from ${current_budget} to ${suggested_budget:.2f}",
+                    priority=SuggestionPriority.MEDIUM,
+                    current_budget=current_budget,
+                    suggested_budget=suggested_budget,
+                    reason="Consistently exceeding current budget"
+                ))
 
             elif actual_spending < current_budget * 0.7:  # Significantly under budget
                 suggested_budget = actual_spending * 1.2  # 20% buffer
 
-                recommendations.append({
-                    'type': SuggestionType.BUDGET_ADJUSTMENT,
-                    'category': category,
-                    'title': f"Reduce {category.replace('_', ' ').title()} Budget",
-                    'description': f"Consider reducing budget from ${current_budget} to ${suggested_budget:.2f}",
-                    'priority': SuggestionPriority.LOW,
-                    'current_budget': current_budget,
-                    'suggested_budget': suggested_budget,
-                    'reason': "Consistently under current budget"
-                })
+                recommendations.append(BudgetAdjustment(
+                    type=SuggestionType.BUDGET_ADJUSTMENT,
+                    category=category,
+                    title=f"Reduce {category.replace('_', ' ').title()} Budget",
+                    description=f"Consider reducing budget from ${current_budget} to ${suggested_budget:.2f}",
+                    priority=SuggestionPriority.LOW,
+                    current_budget=current_budget,
+                    suggested_budget=suggested_budget,
+                    reason="Consistently under current budget"
+                ))
 
         # Handle income trend insights
         for insight in insights:
@@ -274,15 +307,15 @@ class RecommendationEngine:
                 category = insight.get('category', 'income')
 
                 if category == 'income' and trend_percentage < -20:  # Significant income decrease
-                    recommendations.append({
-                        'type': SuggestionType.BUDGET_ADJUSTMENT,
-                        'category': 'overall',
-                        'title': "Review Budget Due to Income Change",
-                        'description': f"Your income has decreased by {abs(trend_percentage):.1f}%. Consider adjusting your overall budget.",
-                        'priority': SuggestionPriority.HIGH,
-                        'current_budget': 0,  # Not category-specific
-                        'suggested_budget': 0,  # Not category-specific
-                        'reason': f"Income decreased by {abs(trend_percentage):.1f}%"
-                    })
+                    recommendations.append(BudgetAdjustment(
+                        type=SuggestionType.BUDGET_ADJUSTMENT,
+                        category='overall',
+                        title="Review Budget Due to Income Change",
+                        description=f"Your income has decreased by {abs(trend_percentage):.1f}%. Consider adjusting your overall budget.",
+                        priority=SuggestionPriority.HIGH,
+                        current_budget=0,  # Not category-specific
+                        suggested_budget=0,  # Not category-specific
+                        reason=f"Income decreased by {abs(trend_percentage):.1f}%"
+                    ))
 
         return recommendations
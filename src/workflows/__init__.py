@@ -3,12 +3,13 @@ LangGraph Workflows Module
 Complete transaction processing workflows with multi-agent orchestration
 """
 
-from .unified_workflow import UnifiedTransactionWorkflow, get_workflow_instance
+from .unified_workflow import UnifiedTransactionWorkflow, get_workflow_instance, get_workflow
 from .config import LangGraphConfig, get_workflow_config, WorkflowMode
 
 __all__ = [
     "UnifiedTransactionWorkflow",
     "get_workflow_instance",
+    "get_workflow",
     "WorkflowMode",
     "LangGraphConfig",
     "get_workflow_config"
@@ -5,6 +5,7 @@ Complete implementation of the 7-agent transaction processing pipeline
 
 import logging
 import asyncio
+import threading
 from typing import Dict, Any, List, Optional, Union, Callable
 from datetime import datetime, timedelta
 import uuid
@@ -888,15 +889,27 @@ class UnifiedTransactionWorkflow:
 
 # Global workflow instance (singleton pattern)
 _workflow_instance: Optional[UnifiedTransactionWorkflow] = None
+_workflow_instance_lock = threading.Lock()
 
 def get_workflow_instance(config: Optional[LangGraphConfig] = None) -> UnifiedTransactionWorkflow:
     """Get or create the global workflow instance"""
     global _workflow_instance
     if _workflow_instance is None:
-        _workflow_instance = UnifiedTransactionWorkflow(config=config)
-        logger.info("🚀 Global UnifiedTransactionWorkflow instance created")
+        # Double-checked so concurrent first callers (e.g. executor threads) build a single instance
+        with _workflow_instance_lock:
+            if _workflow_instance is None:
+                _workflow_instance = UnifiedTransactionWorkflow(config=config)
+                logger.info("🚀 Global UnifiedTransactionWorkflow instance created")
     return _workflow_instance
 
+def get_workflow() -> UnifiedTransactionWorkflow:
+    """
+    Dependency for FastAPI to get the global workflow instance
+    Usage: workflow: UnifiedTransactionWorkflow = Depends(get_workflow)
+    Takes no parameters, so FastAPI doesn't read get_workflow_instance's config as a request body
+    """
+    return get_workflow_instance()
+
 def reset_workflow_instance():
     """Reset the global workflow instance (useful for testing)"""
     global _workflow_instance
@@ -0,0 +1,9 @@
+"""Shared pytest configuration"""
+
+import os
+
+# Settings and the database config read these at import time; tests never connect with them
+os.environ.setdefault("DATABASE_URL", "sqlite:///./fintrack-test.db")
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_SERVICE_ROLE_KEY", "test-service-role-key")
+os.environ.setdefault("LANGCHAIN_TRACING_V2", "false")
@@ -0,0 +1,171 @@
+"""Tests for the per-user analysis cache of the analytics endpoints"""
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from src.api import analytics
+from src.workflows.unified_workflow import get_workflow
+
+
+class _Result:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+class _Query:
+    """The subset of the Supabase query builder the analytics helpers use, over in-memory rows"""
+
+    def __init__(self, client, columns, count=None):
+        self.client = client
+        self.columns = columns.split(",")
+        self.count = count
+        self.filters = []
+        self.orders = []
+        self.bounds = None
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row[column] == value)
+        return self
+
+    def gte(self, column, value):
+        self.filters.append(lambda row: row[column] >= value)
+        return self
+
+    def lte(self, column, value):
+        self.filters.append(lambda row: row[column] <= value)
+        return self
+
+    def order(self, column, desc=False, nullsfirst=None):
+        self.orders.append((column, desc))
+        return self
+
+    def limit(self, n):
+        self.bounds = (0, n)
+        return self
+
+    def range(self, start, end):
+        self.bounds = (start, end + 1)
+        return self
+
+    def execute(self):
+        self.client.queries += 1
+        rows = [row for row in self.client.rows if all(f(row) for f in self.filters)]
+        for column, desc in reversed(self.orders):
+            rows.sort(key=lambda row: row[column], reverse=desc)
+        total = len(rows)
+        if self.bounds is not None:
+            rows = rows[self.bounds[0]:self.bounds[1]]
+        return _Result([{c: row[c] for c in self.columns} for row in rows], total if self.count else None)
+
+
+class _Table:
+    def __init__(self, client):
+        self.client = client
+
+    def select(self, columns, count=None):
+        return _Query(self.client, columns, count)
+
+
+class _Supabase:
+    def __init__(self, rows):
+        self.rows = rows
+        self.queries = 0
+
+    def table(self, name):
+        assert name == "transactions"
+        return _Table(self)
+
+
+class _Workflow:
+    def __init__(self):
+        self.runs = 0
+
+    async def execute_workflow(self, raw_transactions, **kwargs):
+        self.runs += 1
+        return {
+            "status": "success",
+            "result": {"pattern_insights": [{"description": f"{len(raw_transactions)} transactions"}]}
+        }
+
+
+def _row(tx_id, amount, updated_at, date="2024-01-10"):
+    return {
+        "id": tx_id, "user_id": "user-1", "date": date, "amount": amount, "description": "Keells",
+        "payment_method": "debit_card", "merchant_name": "Keells", "category": "groceries",
+        "updated_at": updated_at
+    }
+
+
+@pytest.fixture
+def workflow():
+    analytics._analysis_cache.clear()
+    yield _Workflow()
+    analytics._analysis_cache.clear()
+
+
+async def _analyze(supabase, workflow):
+    return await analytics._analyze_user_transactions(
+        supabase, workflow, "user-1", "Analyze my spending patterns", "Analysis failed"
+    )
+
+
+@pytest.mark.asyncio
+async def test_unchanged_transactions_reuse_the_analysis(workflow):
+    supabase = _Supabase([_row(1, -20.0, "2024-01-10T10:00:00+00:00")])
+
+    first = await _analyze(supabase, workflow)
+    queries_after_first = supabase.queries
+    second = await _analyze(supabase, workflow)
+
+    assert workflow.runs == 1
+    # A hit costs only the version query
+    assert supabase.queries == queries_after_first + 1
+    assert second == first
+
+
+@pytest.mark.asyncio
+async def test_insert_and_update_invalidate_the_analysis(workflow):
+    supabase = _Supabase([_row(1, -20.0, "2024-01-10T10:00:00+00:00")])
+    await _analyze(supabase, workflow)
+
+    supabase.rows.append(_row(2, -35.0, "2024-01-11T09:00:00+00:00", date="2024-01-11"))
+    inserted = await _analyze(supabase, workflow)
+    assert workflow.runs == 2
+    assert inserted == ({"pattern_insights": [{"description": "2 transactions"}]}, 2)
+
+    supabase.rows[0] = {**supabase.rows[0], "amount": -25.0, "updated_at": "2024-01-12T08:00:00+00:00"}
+    await _analyze(supabase, workflow)
+    assert workflow.runs == 3
+
+
+@pytest.mark.asyncio
+async def test_callers_get_their_own_copy_of_a_cached_analysis(workflow):
+    supabase = _Supabase([_row(1, -20.0, "2024-01-10T10:00:00+00:00")])
+
+    first = await _analyze(supabase, workflow)
+    first[0]["pattern_insights"].clear()
+    second = await _analyze(supabase, workflow)
+    second[0]["pattern_insights"].append({"description": "mutated"})
+    third = await _analyze(supabase, workflow)
+
+    assert workflow.runs == 1
+    assert third[0]["pattern_insights"] == [{"description": "1 transactions"}]
+
+
+def test_endpoints_take_the_workflow_from_the_dependency(workflow, monkeypatch):
+    supabase = _Supabase([_row(1, -20.0, "2024-01-10T10:00:00+00:00")])
+
+    async def get_db_client():
+        return supabase
+
+    monkeypatch.setattr(analytics, "get_db_client", get_db_client)
+    app = FastAPI()
+    app.include_router(analytics.router)
+    app.dependency_overrides[get_workflow] = lambda: workflow
+
+    response = TestClient(app).get("/analytics/patterns/user-1")
+
+    assert response.status_code == 200
+    assert workflow.runs == 1
@@ -0,0 +1,157 @@
+"""Tests for the profile-driven detectors of the Safety & Compliance Guard Agent"""
+
+from datetime import datetime
+
+import numpy as np
+
+from src.agents.safety_guard_agent import SafetyGuardAgent, SafetyGuardAgentInput
+from src.models.anomaly_detector import AnomalyDetector
+from src.schemas.transaction_schemas import ClassifiedTransaction, TransactionCategory
+
+
+def _tx(tx_id: str, amount: float, category: TransactionCategory = TransactionCategory.FOOD_DINING,
+        merchant: str = "Keells", date: datetime = datetime(2024, 1, 10, 12, 30, 7)) -> ClassifiedTransaction:
+    return ClassifiedTransaction(
+        id=tx_id,
+        date=date,
+        year=date.year,
+        month=date.month,
+        day=date.day,
+        day_of_week=date.weekday(),
+        amount=amount,
+        transaction_type="expense",
+        payment_method="debit_card",
+        description_cleaned="test transaction",
+        merchant_name=merchant,
+        predicted_category=category,
+        prediction_confidence=0.9
+    )
+
+
+def _ids(transactions):
+    return [tx.id for tx in transactions]
+
+
+def test_category_baselines_flag_amounts_far_from_the_category_mean():
+    # Fewer than 4 transactions, so only the z-score check can flag anything
+    transactions = [_tx("a", -10.0), _tx("b", -11.0), _tx("c", -500.0)]
+    profile = {"category_baselines": {"food_dining": {"mean": 10.0, "std": 1.0}}}
+
+    flagged = SafetyGuardAgent().detect_amount_anomalies(transactions, profile)
+
+    assert _ids(flagged) == ["c"]
+
+
+def test_category_baselines_ignore_categories_without_a_baseline():
+    transactions = [_tx("a", -10.0), _tx("b", -500.0, TransactionCategory.GROCERIES)]
+    profile = {"category_baselines": {"food_dining": {"mean": 10.0, "std": 1.0}}}
+
+    assert SafetyGuardAgent().detect_amount_anomalies(transactions, profile) == []
+
+
+def test_merchant_count_baselines_flag_unusual_merchant_counts():
+    transactions = [_tx(f"k{i}", -20.0, merchant="Keells") for i in range(5)]
+    transactions.append(_tx("u", -20.0, TransactionCategory.TRANSPORTATION, merchant="Uber"))
+    profile = {
+        "frequency_threshold": 100,
+        "category_frequency_threshold": 100,
+        "merchant_count_baselines": {"Keells": {"mean": 1.0, "std": 1.0}}
+    }
+
+    flagged = SafetyGuardAgent().detect_frequency_anomalies(transactions, profile)
+
+    assert _ids(flagged) == ["k0", "k1", "k2", "k3", "k4"]
+
+
+def test_unusual_hours_replace_the_default_time_window():
+    late = _tx("late", -20.0, date=datetime(2024, 1, 10, 22, 15))
+    early = _tx("early", -20.0, date=datetime(2024, 1, 10, 2, 15))
+    agent = SafetyGuardAgent()
+
+    assert _ids(agent.detect_time_anomalies([late, early], {})) == ["early"]
+    assert _ids(agent.detect_time_anomalies([late, early], {"unusual_hours": [22, 23]})) == ["late"]
+
+    output = agent.process(SafetyGuardAgentInput(
+        classified_transactions=[late], user_profile={"unusual_hours": [22, 23], "is_new_user": False}
+    ))
+    assert [alert.alert_type for alert in output.security_alerts] == ["time_anomaly"]
+    assert "during your unusual hours" in output.security_alerts[0].description
+
+
+def _history_features(seed: int = 0) -> np.ndarray:
+    # Feature rows in _featurize layout: amount, hour, day of week, merchant frequency, category deviation
+    rng = np.random.default_rng(seed)
+    return np.column_stack([
+        rng.normal(50.0, 5.0, 300),
+        rng.normal(12.0, 2.0, 300),
+        rng.normal(2.0, 0.5, 300),
+        rng.normal(1.0, 0.1, 300),
+        rng.normal(0.0, 1.0, 300)
+    ])
+
+
+def _forest_batch():
+    wednesday_noon = datetime(2024, 1, 10, 12, 30, 7)
+    sunday_night = datetime(2024, 1, 14, 3, 30, 7)
+    return [
+        _tx("a", -50.0, TransactionCategory.FOOD_DINING, "Keells", wednesday_noon),
+        _tx("b", -52.0, TransactionCategory.GROCERIES, "Cargills", wednesday_noon),
+        _tx("c", -100000.0, TransactionCategory.SHOPPING, "Odel", sunday_night)
+    ]
+
+
+def _forest_outliers(agent: SafetyGuardAgent, transactions, user_profile):
+    amounts = agent._abs_amounts(transactions)
+    hours, _ = agent._extract_time_features(transactions)
+    merchant_ids, category_ids, _, _ = agent._encode_batch(transactions)
+    return agent._mask_forest(transactions, amounts, hours, merchant_ids, category_ids, user_profile)
+
+
+def test_history_features_forest_flags_outliers():
+    transactions = _forest_batch()
+    agent = SafetyGuardAgent()
+    baselines = agent._build_baselines({})
+    amounts = agent._abs_amounts(transactions)
+
+    outliers = _forest_outliers(agent, transactions, {"user_id": "forest-user", "history_features": _history_features().tolist()})
+
+    assert outliers.tolist() == [False, False, True]
+    assert agent._mask_amount(amounts, baselines, forest_outliers=outliers).tolist() == [False, False, True]
+
+
+def test_history_features_forest_is_fitted_once_per_profile_version():
+    history = _history_features().tolist()
+    profile = {"user_id": "cached-user", "profile_version": 1, "history_features": history}
+
+    forest = SafetyGuardAgent()._profile_forest(profile)
+
+    # A later run (new agent, new profile dict) reuses the fitted forest until the version changes
+    assert SafetyGuardAgent()._profile_forest(dict(profile)) is forest
+    assert SafetyGuardAgent()._profile_forest({**profile, "profile_version": 2}) is not forest
+    # Without a user_id there is no stable key, so no forest is fitted
+    assert SafetyGuardAgent()._profile_forest({"history_features": history}) is None
+
+
+def test_persisted_anomaly_model_is_used_before_the_profile_forest(tmp_path):
+    detector = AnomalyDetector(model_path=str(tmp_path / "anomaly_detector.joblib"))
+    detector.train(_history_features())
+    agent = SafetyGuardAgent()
+    agent.anomaly_detector = detector
+
+    # No history_features in the profile: the persisted model alone scores the batch
+    assert _forest_outliers(agent, _forest_batch(), {}).tolist()[-1] is True
+
+
+def test_spending_limits_match_category_values_and_enum_strings():
+    transactions = [
+        _tx("dining", -300.0),
+        _tx("groceries", -300.0, TransactionCategory.GROCERIES),
+        _tx("shopping", -300.0, TransactionCategory.SHOPPING)
+    ]
+    limits = {"food_dining": 100.0, "TransactionCategory.GROCERIES": 200.0}
+
+    alerts = SafetyGuardAgent().check_spending_limits(transactions, limits)
+
+    assert [alert.transaction_id for alert in alerts] == ["dining", "groceries"]
+    assert alerts[0].title == "Spending limit exceeded for food_dining"
+    assert "exceeds your groceries limit of LKR 200.00" in alerts[1].description
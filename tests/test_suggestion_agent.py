@@ -0,0 +1,190 @@
+"""Tests for the response building and caches of the Suggestion Agent"""
+
+import asyncio
+
+import pytest
+
+from src.agents.suggestion_agent import SuggestionAgent, SuggestionAgentInput, SuggestionCache, _spending_suggestion
+from src.schemas.transaction_schemas import BudgetAlert, PatternInsight, SavingsOpportunity, Suggestion
+from src.utils.recommendation_engine import SuggestionType
+
+
+def _insight(insight_type: str = 'spike', category: str = 'groceries', amount: float = 500.0) -> PatternInsight:
+    return PatternInsight(
+        insight_type=insight_type,
+        category=category,
+        description='Spending spike detected',
+        severity='medium',
+        transactions_involved=[],
+        metadata={'amount': amount, 'current_amount': amount, 'previous_amount': amount / 2}
+    )
+
+
+def _count_calls(agent: SuggestionAgent, method: str) -> list:
+    calls = []
+    original = getattr(agent, method)
+
+    def counting(*args, **kwargs):
+        calls.append(args)
+        return original(*args, **kwargs)
+
+    setattr(agent, method, counting)
+    return calls
+
+
+class _TransactionService:
+    """Counts spending profile lookups; each takes a moment so concurrent callers overlap"""
+
+    def __init__(self, total_transactions: int = 40):
+        self.total_transactions = total_transactions
+        self.calls = 0
+
+    async def get_user_spending_profile(self, user_id: str) -> dict:
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        return {'total_transactions': self.total_transactions, 'total_spending': 1000.0}
+
+
+def _profile_only_input(user_id: str = 'user-1') -> SuggestionAgentInput:
+    # A monthly trend is not a meaningful pattern, so the response is built from the profile alone
+    return SuggestionAgentInput(
+        pattern_insights=[_insight(insight_type='monthly_trend')],
+        budget_thresholds={},
+        user_preferences={},
+        user_id=user_id
+    )
+
+
+def test_spending_suggestion_dumps_the_suggestion_itself():
+    # Shares its type with the goal-setting template but carries its own content
+    suggestion = Suggestion(
+        suggestion_type='goal_setting',
+        title='Save for a Vacation',
+        description='Put aside 10% of your income each month.',
+        category='planning',
+        priority='low',
+        potential_savings=120.0,
+        action_required=True,
+        implementation_difficulty='easy',
+        metadata={'goal': 'vacation'}
+    )
+
+    entry = _spending_suggestion(suggestion)
+
+    assert entry['title'] == 'Save for a Vacation'
+    assert entry['metadata'] == {'goal': 'vacation'}
+    assert entry['potential_monthly_savings'] == 120.0
+
+
+@pytest.mark.asyncio
+async def test_pattern_results_are_memoized_however_fast_the_run():
+    agent = SuggestionAgent()
+    calls = _count_calls(agent, 'generate_budget_alerts')
+    insights = [_insight(category='memo_groceries')]
+
+    first = await agent._generate_pattern_suggestions(insights, {'memo_groceries': 100.0})
+    second = await agent._generate_pattern_suggestions(insights, {'memo_groceries': 100.0})
+
+    assert len(calls) == 1
+    assert second == first
+
+
+def test_prioritize_suggestions_orders_by_priority_then_savings():
+    def suggestion(title: str, priority: str, potential_savings: float) -> Suggestion:
+        return Suggestion(
+            suggestion_type='spending_reduction', title=title, description=title, category='general',
+            priority=priority, potential_savings=potential_savings, action_required=True,
+            implementation_difficulty='easy', metadata={}
+        )
+
+    suggestions = [
+        suggestion('low', 'low', 900.0),
+        suggestion('high-small', 'high', 10.0),
+        suggestion('medium', 'medium', 50.0),
+        suggestion('high-large', 'high', 300.0),
+        suggestion('high-small-later', 'high', 10.0)
+    ]
+
+    prioritized = SuggestionAgent().prioritize_suggestions(suggestions)
+
+    assert [s.title for s in prioritized] == ['high-large', 'high-small', 'high-small-later', 'medium', 'low']
+
+
+def test_alert_suggestions_carry_every_other_alert_field_as_metadata():
+    alert = BudgetAlert(
+        type=SuggestionType.BUDGET_ALERT, category='groceries', title='Budget Alert: Groceries',
+        description='Over budget', priority='high', amount_exceeded=50.0, percentage_exceeded=25.0
+    )
+    opp = SavingsOpportunity(
+        type=SuggestionType.SAVINGS_OPPORTUNITY, category='shopping', title='Save on Shopping',
+        description='Cut back', priority='medium', potential_savings=40.0, tips=('Compare prices',),
+        current_spending=400.0
+    )
+
+    alert_suggestion = SuggestionAgent._budget_alert_suggestion(alert)
+    opp_suggestion = SuggestionAgent._savings_opportunity_suggestion(opp)
+
+    assert alert_suggestion.metadata == {'type': 'budget_alert', 'amount_exceeded': 50.0, 'percentage_exceeded': 25.0}
+    assert type(alert_suggestion.metadata['type']) is str
+    assert opp_suggestion.metadata == {'type': 'savings_opportunity', 'potential_savings': 40.0, 'current_spending': 400.0}
+
+
+@pytest.mark.asyncio
+async def test_concurrent_profile_lookups_share_one_query_until_invalidated():
+    service = _TransactionService()
+    agent = SuggestionAgent(transaction_service=service)
+
+    profiles = await asyncio.gather(*(agent._get_user_spending_profile('user-1') for _ in range(5)))
+    assert service.calls == 1
+    assert all(profile['transaction_count'] == 40 for profile in profiles)
+    assert agent.cache.inflight == {}
+
+    await agent._get_user_spending_profile('user-1')
+    assert service.calls == 1
+
+    service.total_transactions = 41
+    agent.cache.invalidate_user('user-1')
+    profile = await agent._get_user_spending_profile('user-1')
+    assert service.calls == 2
+    assert profile['transaction_count'] == 41
+
+
+@pytest.mark.asyncio
+async def test_profile_only_responses_are_cached_until_the_user_is_invalidated():
+    service = _TransactionService()
+    agent = SuggestionAgent(transaction_service=service)
+
+    first = await agent.process(_profile_only_input())
+    second = await agent.process(_profile_only_input())
+    assert service.calls == 1
+    assert second == first
+    assert second is not first
+
+    agent.cache.invalidate_user('user-1')
+    await agent.process(_profile_only_input())
+    assert service.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_agents_share_caches_only_when_one_is_injected():
+    service = _TransactionService()
+
+    await SuggestionAgent(transaction_service=service).process(_profile_only_input())
+    await SuggestionAgent(transaction_service=service).process(_profile_only_input())
+    assert service.calls == 2
+
+    cache = SuggestionCache()
+    await SuggestionAgent(transaction_service=service, cache=cache).process(_profile_only_input())
+    await SuggestionAgent(transaction_service=service, cache=cache).process(_profile_only_input())
+    assert service.calls == 3
+
+
+def test_engine_dicts_are_detached_from_the_insights():
+    insight = _insight()
+
+    insight_dict = SuggestionAgent._to_dicts([insight])[0]
+    insight_dict['metadata']['amount'] = 0.0
+    insight_dict['category'] = 'other'
+
+    assert insight.metadata['amount'] == 500.0
+    assert insight.category == 'groceries'